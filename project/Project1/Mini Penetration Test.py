@@ -1,45 +1,57 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import datetime
+import argparse
+import asyncio
+import sys
+from urllib.parse import urljoin, urlsplit
+
+from scan_engine import ScanEngine, load_targets, normalize_target
+from scan_http import needs
+from scan_crawler import Crawler
+from scan_registry import register_check, load_plugins, select_checks
+from scan_output import NdjsonWriter, SarifWriter, RiskSummary, ResumeLog
+from scan_state import ScanStateStore, diff_findings
 
 # ==========================
 # CONFIGURATION
 # ==========================
 TARGET_URL = "http://localhost/dvwa/"  # Change to TryHackMe / HTB / DVWA URL
 TIMEOUT = 5
+CONCURRENCY = 50      # targets scanned at the same time
+PER_HOST_RATE = 5     # max requests per second to any one host
+CRAWL_DEPTH = 2       # link hops from the landing page (0 = landing page + seeds only)
+CRAWL_PAGES = 200     # page budget per target
+MAX_METHOD_CHECKS = 20  # endpoints probed with OPTIONS per target
 
-# ==========================
-# REPORT STORAGE
-# ==========================
-report = {
-    "target": TARGET_URL,
-    "date": str(datetime.date.today()),
-    "findings": []
-}
+# Each check gets a ScanContext (see scan_engine.py) holding that target's
+# own report; findings go through ctx.add_finding. Checks register with
+# @register_check (see scan_registry.py; --plugin loads more from other
+# modules) and declare what they fetch with @needs so each URL is
+# requested once per scan and shared.
 
 # ==========================
-# HELPER FUNCTIONS
+# 0. SITE CRAWL
 # ==========================
-def add_finding(title, risk, description, recommendation):
-    report["findings"].append({
-        "title": title,
-        "risk": risk,
-        "description": description,
-        "recommendation": recommendation
-    })
+@register_check("crawl", "Same-origin crawl for pages, forms and endpoints", order=0)
+@needs(("GET", ""), ("GET", "/robots.txt"), ("GET", "/sitemap.xml"))
+async def crawl_site(ctx):
+    crawler = Crawler(ctx,
+                      max_depth=ctx.options.get("crawl_depth", CRAWL_DEPTH),
+                      max_pages=ctx.options.get("crawl_pages", CRAWL_PAGES))
+    ctx.report["crawl"] = await crawler.crawl()
+    ctx.crawl = crawler
 
 # ==========================
 # 1. RECONNAISSANCE
 # ==========================
-def reconnaissance():
+@register_check("reconnaissance", "Server banner and missing security headers", order=10, default_risk="Medium")
+@needs(("GET", ""))
+async def reconnaissance(ctx):
     try:
-        response = requests.get(TARGET_URL, timeout=TIMEOUT)
+        response = await ctx.request("GET", ctx.target)
         headers = response.headers
 
         # Server information disclosure
         if "Server" in headers:
-            add_finding(
+            ctx.add_finding(
                 title="Server Header Disclosure",
                 risk="Low",
                 description=f"Server header reveals: {headers['Server']}",
@@ -56,7 +68,7 @@ def reconnaissance():
 
         for header in security_headers:
             if header not in headers:
-                add_finding(
+                ctx.add_finding(
                     title=f"Missing Security Header: {header}",
                     risk="Medium",
                     description=f"{header} is not present in HTTP response.",
@@ -64,70 +76,107 @@ def reconnaissance():
                 )
 
     except Exception as e:
-        print(f"[!] Reconnaissance failed: {e}")
+        print(f"[!] Reconnaissance failed for {ctx.target}: {e}", file=sys.stderr)
 
 # ==========================
 # 2. ROBOTS.TXT CHECK
 # ==========================
-def check_robots():
+@register_check("robots", "Publicly readable robots.txt", order=20, default_risk="Low")
+@needs(("GET", "/robots.txt"))
+async def check_robots(ctx):
     try:
-        robots_url = urljoin(TARGET_URL, "/robots.txt")
-        response = requests.get(robots_url, timeout=TIMEOUT)
+        robots_url = urljoin(ctx.target, "/robots.txt")
+        response = await ctx.request("GET", robots_url)
 
         if response.status_code == 200:
-            add_finding(
+            ctx.add_finding(
                 title="robots.txt Accessible",
                 risk="Low",
                 description="robots.txt file is publicly accessible and may reveal sensitive paths.",
                 recommendation="Avoid listing sensitive directories in robots.txt."
             )
-    except:
+    except Exception:
         pass
 
 # ==========================
 # 3. FORM DISCOVERY
 # ==========================
-def discover_forms():
+@register_check("forms", "HTML forms accepting user input", order=30)
+@needs(("GET", ""))
+async def discover_forms(ctx):
     try:
-        response = requests.get(TARGET_URL, timeout=TIMEOUT)
-        soup = BeautifulSoup(response.text, "html.parser")
-        forms = soup.find_all("form")
+        if ctx.crawl is not None:
+            forms = ctx.crawl.forms
+            pages = len({page for form in forms for page in form["pages"]})
+            actions = sorted({f"{form['method']} {form['action']}" for form in forms})
+            description = f"{len(forms)} distinct form(s) detected across {pages} page(s): {', '.join(actions[:10])}"
+            if len(actions) > 10:
+                description += f" and {len(actions) - 10} more"
+        else:
+            soup = await ctx.soup(ctx.target)
+            forms = soup.find_all("form")
+            description = f"{len(forms)} form(s) detected on the application."
 
         if forms:
-            add_finding(
+            ctx.add_finding(
                 title="HTML Forms Detected",
                 risk="Informational",
-                description=f"{len(forms)} form(s) detected on the application.",
+                description=description,
                 recommendation="Ensure all form inputs are validated and sanitized server-side."
             )
-    except:
+    except Exception:
         pass
 
 # ==========================
 # 4. HTTP METHOD CHECK
 # ==========================
-def check_http_methods():
-    try:
-        response = requests.options(TARGET_URL, timeout=TIMEOUT)
-        methods = response.headers.get("Allow", "")
+@register_check("http-methods", "PUT/DELETE allowed by the server", order=40, default_risk="High")
+@needs(("OPTIONS", ""))
+async def check_http_methods(ctx):
+    # the landing page plus whatever endpoints the crawl turned up (query strings dropped)
+    urls = [ctx.target]
+    if ctx.crawl is not None:
+        paths = {urljoin(endpoint, urlsplit(endpoint).path) for endpoint in ctx.crawl.endpoints}
+        urls += sorted(paths - {ctx.target})[:MAX_METHOD_CHECKS - 1]
+
+    async def probe(url):
+        try:
+            response = await ctx.request("OPTIONS", url)
+            return url, response.headers.get("Allow", "")
+        except Exception:
+            return url, ""
 
+    for url, methods in await asyncio.gather(*(probe(url) for url in urls)):
         if "PUT" in methods or "DELETE" in methods:
-            add_finding(
+            where = "" if url == ctx.target else f" on {url}"
+            ctx.add_finding(
                 title="Dangerous HTTP Methods Enabled",
                 risk="High",
-                description=f"Potentially dangerous HTTP methods allowed: {methods}",
+                description=f"Potentially dangerous HTTP methods allowed{where}: {methods}",
                 recommendation="Disable unnecessary HTTP methods on the server."
             )
-    except:
-        pass
 
 # ==========================
 # REPORT OUTPUT
 # ==========================
-def generate_report():
+def generate_report(report):
     print("\n=== SECURITY ASSESSMENT REPORT ===")
     print(f"Target: {report['target']}")
     print(f"Date: {report['date']}")
+    network = report.get("network")
+    if network:
+        print(f"Network requests: {network['requests']} ({network['saved']} saved by the response cache)")
+    if report.get("unchanged"):
+        print(f"Unchanged since the full scan of {report['unchanged']}; showing those findings")
+    elif "changes" in report:
+        changes = report["changes"]
+        print(f"Changes since last scan: {len(changes['added'])} new, {len(changes['resolved'])} resolved")
+        for finding in changes["resolved"]:
+            print(f"   resolved: {finding['title']}")
+    crawl = report.get("crawl")
+    if crawl:
+        print(f"Crawled: {crawl['pages']} page(s), {crawl['forms']} form(s), "
+              f"{crawl['endpoints']} endpoint(s) in {crawl['seconds']}s")
     print("\nFindings:\n")
 
     if not report["findings"]:
@@ -143,12 +192,115 @@ def generate_report():
 # ==========================
 # MAIN EXECUTION
 # ==========================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mini penetration test against one or many targets.")
+    parser.add_argument("targets", nargs="*", help=f"target URLs (default: {TARGET_URL})")
+    parser.add_argument("-f", "--targets-file", help="file with one target per line, '-' for stdin")
+    parser.add_argument("-c", "--concurrency", type=int, default=CONCURRENCY,
+                        help="targets scanned at the same time")
+    parser.add_argument("-r", "--rate", type=float, default=PER_HOST_RATE,
+                        help="max requests per second to a single host (0 = unlimited)")
+    parser.add_argument("-t", "--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("-d", "--depth", type=int, default=CRAWL_DEPTH, help="crawl depth, -1 to skip crawling")
+    parser.add_argument("-p", "--max-pages", type=int, default=CRAWL_PAGES, help="crawl page budget per target")
+    parser.add_argument("--plugin", action="append", default=[], help="module with extra @register_check checks")
+    parser.add_argument("--checks", help="comma-separated checks to run (default: all)")
+    parser.add_argument("--skip", help="comma-separated checks to leave out")
+    parser.add_argument("--list-checks", action="store_true", help="list registered checks and exit")
+    parser.add_argument("--ndjson", help="stream findings as NDJSON to this file ('-' for stdout)")
+    parser.add_argument("--sarif", help="stream findings as SARIF 2.1.0 to this file")
+    parser.add_argument("--resume", help="resume file: finished targets are recorded here and skipped on restart")
+    parser.add_argument("--state", help="SQLite scan-state store; unchanged hosts are skipped and only "
+                                        "new/resolved findings are streamed")
+    parser.add_argument("--max-age", type=float, default=7,
+                        help="days before a full rescan is forced even for unchanged hosts (0 = never)")
+    parser.add_argument("--full", action="store_true", help="ignore validators and rescan everything (state is still updated)")
+    return parser.parse_args()
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+
 if __name__ == "__main__":
-    print("[*] Starting security assessment...\n")
+    args = parse_args()
+    load_plugins(args.plugin)
 
-    reconnaissance()
-    check_robots()
-    discover_forms()
-    check_http_methods()
+    if args.list_checks:
+        for check in select_checks():
+            print(f"{check.check_name:<16} order={check.order:<4} {check.description}")
+        raise SystemExit(0)
+
+    skip = split_names(args.skip)
+    if args.depth < 0 and "crawl" not in skip:
+        skip.append("crawl")
+    checks = select_checks(split_names(args.checks), skip)
+
+    targets = [normalize_target(target) for target in args.targets]
+    if args.targets_file:
+        targets += load_targets(args.targets_file)
+    if not targets:
+        targets = [TARGET_URL]
+
+    # keep stdout clean when a machine-readable stream is going there
+    streaming_to_stdout = "-" in (args.ndjson, args.sarif)
+    console = sys.stderr if streaming_to_stdout else sys.stdout
+
+    summary = RiskSummary()
+    resume = ResumeLog(args.resume) if args.resume else None
+    if resume:
+        targets = [target for target in targets if target not in resume.done]
+        if args.ndjson and args.ndjson != "-":
+            summary.load_ndjson(args.ndjson)
+        print(f"[*] Resuming: {len(resume.done)} target(s) already done", file=console)
+
+    writers = []
+    if args.ndjson:
+        writers.append(NdjsonWriter(args.ndjson, append=resume is not None))
+    if args.sarif:
+        writers.append(SarifWriter(args.sarif, checks))
+
+    state = ScanStateStore(args.state, max_age_days=args.max_age) if args.state else None
+
+    def on_check(report, check, findings):
+        if state is None:
+            for writer in writers:
+                writer.findings(report, check.check_name, findings)
+            return
+        # with a state store only the difference to the last scan goes out
+        baseline = [f for f in report["baseline"] if f.get("check") == check.check_name]
+        added, resolved = diff_findings(baseline, findings)
+        for writer in writers:
+            writer.findings(report, check.check_name, added, baseline_state="new")
+            writer.resolved(report, check.check_name, resolved)
+
+    def on_report(report):
+        summary.add(report["target"], report["findings"])
+        for writer in writers:
+            writer.target_done(report)
+        if resume:
+            resume.mark(report["target"])
+        if not streaming_to_stdout:
+            generate_report(report)
+
+    print(f"[*] Starting security assessment of {len(targets)} target(s)...\n", file=console)
+
+    options = {"crawl_depth": args.depth, "crawl_pages": args.max_pages}
+    engine = ScanEngine(checks, concurrency=args.concurrency, per_host_rate=args.rate,
+                        timeout=args.timeout, options=options, state=state, force_full=args.full)
+    try:
+        asyncio.run(engine.run(targets, on_report=on_report, on_check=on_check))
+    except KeyboardInterrupt:
+        print("\n[!] Interrupted" + (f"; rerun with --resume {args.resume} to continue" if resume else ""),
+              file=console)
+    finally:
+        for writer in writers:
+            writer.summary(summary)
+            writer.close()
+        if resume:
+            resume.close()
+        if state:
+            state.close()
 
-    generate_report()
+    summary.print_summary(file=console)
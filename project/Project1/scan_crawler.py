@@ -0,0 +1,225 @@
+import asyncio
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from scan_http import read_capped
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SITEMAP_LOC = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+
+
+# ==========================
+# URL HELPERS
+# ==========================
+def normalize_url(url):
+    """Canonical form used for dedupe: no fragment, default port dropped, sorted query."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def same_origin(url, origin):
+    parts = urlsplit(url)
+    return (parts.scheme, parts.netloc) == origin
+
+
+# ==========================
+# STREAMING HTML PARSER
+# ==========================
+class PageParser(HTMLParser):
+    """Event-based parser that only keeps links, forms and referenced endpoints."""
+
+    def __init__(self, page_url):
+        super().__init__(convert_charrefs=True)
+        self.base = page_url
+        self.page_url = page_url
+        self.links = []
+        self.endpoints = []
+        self.forms = []
+        self._form = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "base" and attrs.get("href"):
+            self.base = urljoin(self.base, attrs["href"])
+        elif tag in ("a", "area", "iframe", "frame") and (attrs.get("href") or attrs.get("src")):
+            self.links.append(urljoin(self.base, attrs.get("href") or attrs.get("src")))
+        elif tag in ("script", "img", "link") and (attrs.get("src") or attrs.get("href")):
+            self.endpoints.append(urljoin(self.base, attrs.get("src") or attrs.get("href")))
+        elif tag == "form":
+            self._form = {
+                "page": self.page_url,
+                "action": urljoin(self.base, attrs.get("action") or self.page_url),
+                "method": (attrs.get("method") or "GET").upper(),
+                "inputs": []
+            }
+            self.forms.append(self._form)
+        elif tag in ("input", "textarea", "select", "button") and self._form is not None:
+            if attrs.get("name"):
+                self._form["inputs"].append(attrs["name"])
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+
+
+def parse_page(page_url, html):
+    parser = PageParser(page_url)
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def form_key(form):
+    return form["method"], normalize_url(form["action"]), tuple(sorted(form["inputs"]))
+
+
+# ==========================
+# SEEDS
+# ==========================
+def robots_paths(text):
+    """Allow/Disallow paths (without wildcards) and Sitemap URLs from robots.txt."""
+    paths, sitemaps = [], []
+    for line in text.splitlines():
+        field, _, value = line.split("#", 1)[0].partition(":")
+        field, value = field.strip().lower(), value.strip()
+        if field in ("allow", "disallow") and value.startswith("/") and "*" not in value:
+            paths.append(value.rstrip("$"))
+        elif field == "sitemap" and value:
+            sitemaps.append(value)
+    return paths, sitemaps
+
+
+# ==========================
+# CRAWLER
+# ==========================
+class Crawler:
+    """
+    Bounded same-origin breadth-first crawl. Each depth level is fetched
+    concurrently (up to `concurrency` requests) through the scan's HTTP
+    session; URLs are deduped on their normalized form. Only the landing
+    page, robots.txt and sitemap go through the shared response cache.
+    """
+
+    def __init__(self, ctx, max_depth=2, max_pages=200, concurrency=20):
+        self.ctx = ctx
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.semaphore = asyncio.Semaphore(concurrency)
+        parts = urlsplit(ctx.target)
+        self.origin = (parts.scheme, parts.netloc)
+        self.seen = set()
+        self.pages = []
+        self.forms = []          # distinct forms, each with the pages it appears on
+        self._forms = {}
+        self.endpoints = set()
+
+    def _queue(self, url, frontier):
+        if not same_origin(url, self.origin):
+            return
+        key = normalize_url(url)
+        if key in self.seen or len(self.seen) >= self.max_pages:
+            return
+        self.seen.add(key)
+        frontier.append(key)
+
+    async def _seeds(self):
+        frontier = []
+        self._queue(self.ctx.target, frontier)
+        sitemaps = [urljoin(self.ctx.target, "/sitemap.xml")]
+
+        try:
+            robots = await self.ctx.request("GET", urljoin(self.ctx.target, "/robots.txt"))
+            if robots.status_code == 200:
+                paths, listed = robots_paths(robots.text)
+                for path in paths:
+                    self._queue(urljoin(self.ctx.target, path), frontier)
+                sitemaps += listed
+        except Exception:
+            pass
+
+        for sitemap in dict.fromkeys(sitemaps):
+            if not same_origin(sitemap, self.origin):
+                continue
+            try:
+                response = await self.ctx.request("GET", sitemap)
+                if response.status_code == 200:
+                    for loc in SITEMAP_LOC.findall(response.text):
+                        self._queue(loc, frontier)
+            except Exception:
+                pass
+        return frontier
+
+    async def _visit(self, url):
+        """
+        Landing page from the shared cache; other pages are streamed so the
+        status and Content-Type are checked before any body is read, and at
+        most scan_http.MAX_BODY_BYTES of HTML is read.
+        """
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            try:
+                if url == normalize_url(self.ctx.target):
+                    response = await self.ctx.http.fetch("GET", url)
+                    text = response.text if response.status_code == 200 else ""
+                else:
+                    response = await self.ctx.http.fetch("GET", url, stream=True)
+                    text = ""
+                    if response.status_code == 200 and "html" in response.headers.get("Content-Type", "html"):
+                        body = await loop.run_in_executor(self.ctx.http.pool, read_capped, response)
+                        self.ctx.http.observe("GET", url, response, body)
+                        text = body.decode(response.encoding or "utf-8", errors="replace")
+                    else:
+                        response.close()
+            except Exception:
+                return None
+        if response.status_code != 200:
+            return None  # 404s and errors are neither pages nor endpoints
+        if "html" not in response.headers.get("Content-Type", "html"):
+            self.endpoints.add(url)
+            return None
+        self.pages.append(url)
+        return await loop.run_in_executor(self.ctx.http.pool, parse_page, response.url, text)
+
+    async def crawl(self):
+        started = time.perf_counter()
+        frontier = await self._seeds()
+
+        for depth in range(self.max_depth + 1):
+            if not frontier:
+                break
+            parsed = await asyncio.gather(*(self._visit(url) for url in frontier))
+            frontier = []
+            for page in parsed:
+                if page is None:
+                    continue
+                for form in page.forms:
+                    # the same form on many pages (a search box in the layout) is one form
+                    key = form_key(form)
+                    if key in self._forms:
+                        self._forms[key]["pages"].append(form["page"])
+                        continue
+                    form["pages"] = [form.pop("page")]
+                    self._forms[key] = form
+                    self.forms.append(form)
+                    if same_origin(form["action"], self.origin):
+                        self.endpoints.add(normalize_url(form["action"]))
+                for endpoint in page.endpoints:
+                    if same_origin(endpoint, self.origin):
+                        self.endpoints.add(normalize_url(endpoint))
+                if depth < self.max_depth:
+                    for link in page.links:
+                        self._queue(link, frontier)
+
+        return {
+            "pages": len(self.pages),
+            "forms": len(self.forms),
+            "endpoints": len(self.endpoints),
+            "seconds": round(time.perf_counter() - started, 3)
+        }
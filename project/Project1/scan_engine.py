@@ -0,0 +1,251 @@
+import asyncio
+import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from scan_http import MAX_BODY_BYTES, ScanSession, read_capped
+from scan_state import diff_findings
+
+
+# ==========================
+# TARGET LIST
+# ==========================
+def normalize_target(target):
+    if "://" not in target:
+        target = "http://" + target
+    return target if target.endswith("/") else target + "/"
+
+
+def load_targets(path):
+    """One URL per line, '#' comments allowed. '-' reads from stdin."""
+    handle = sys.stdin if path == "-" else open(path)
+    try:
+        targets = []
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                targets.append(normalize_target(line))
+        return targets
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+# ==========================
+# RATE LIMITING
+# ==========================
+class HostRateLimiter:
+    """Spaces out requests so no host sees more than `rate` requests per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot.get(host, now))
+        self.next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# ==========================
+# PER-TARGET STATE
+# ==========================
+class ScanContext:
+    """Everything one target's checks share: its own report and one cached HTTP session."""
+
+    def __init__(self, target, engine):
+        self.target = target
+        self.options = engine.options
+        self.http = ScanSession(engine.pool, engine.limiter, engine.timeout)
+        self.crawl = None  # set by the crawl check, see scan_crawler.py
+        self.report = {
+            "target": target,
+            "date": str(datetime.date.today()),
+            "findings": []
+        }
+
+    def add_finding(self, title, risk, description, recommendation):
+        self.report["findings"].append({
+            "title": title,
+            "risk": risk,
+            "description": description,
+            "recommendation": recommendation
+        })
+
+    async def request(self, method, url, **kwargs):
+        return await self.http.fetch(method, url, **kwargs)
+
+    async def soup(self, url):
+        return await self.http.soup(url)
+
+
+# ==========================
+# ENGINE
+# ==========================
+class ScanEngine:
+    """
+    Runs the checks for many targets at once. `concurrency` caps how many
+    targets are in flight (and sizes the worker pool for blocking requests),
+    `per_host_rate` caps requests per second to any single host. `options`
+    is handed to every check through ctx.options. With a `state` store
+    (scan_state.py) unchanged hosts are detected with conditional requests
+    for everything the last scan read, and their previous findings reused
+    instead of running the checks.
+    """
+
+    def __init__(self, checks, concurrency=50, per_host_rate=5, timeout=5, options=None, state=None,
+                 force_full=False):
+        self.checks = checks
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.options = options or {}
+        self.state = state
+        self.force_full = force_full
+        self.limiter = HostRateLimiter(per_host_rate)
+        self.pool = None
+
+    async def prefetch(self, ctx):
+        """Fetch every resource the checks declared, each URL once, in parallel."""
+        wanted = {(method.upper(), urljoin(ctx.target, path))
+                  for check in self.checks
+                  for method, path in getattr(check, "resources", [])}
+        await asyncio.gather(*(ctx.http.fetch(method, url, prefetch=True) for method, url in wanted),
+                             return_exceptions=True)
+
+    async def revalidate_resource(self, ctx, key, stored):
+        """
+        Conditional request for one resource the checks read last time.
+        Returns (unchanged, validators now); a 200 landing page is kept in
+        the cache for the checks to reuse.
+        """
+        method, url = key.split(" ", 1)
+        headers = {}
+        if stored["etag"]:
+            headers["If-None-Match"] = stored["etag"]
+        if stored["last_modified"]:
+            headers["If-Modified-Since"] = stored["last_modified"]
+
+        streamed = not (method == "GET" and url == ctx.target)
+        response = await ctx.http.fetch(method, url, prefetch=True, headers=headers, stream=streamed)
+        if response.status_code == 304:
+            response.close()
+            return True, {**stored,
+                          "etag": response.headers.get("ETag", stored["etag"]),
+                          "last_modified": response.headers.get("Last-Modified", stored["last_modified"])}
+
+        if not streamed:
+            body = response.content[:MAX_BODY_BYTES]
+            if response.status_code == 200:
+                ctx.http.remember(method, url, response)
+        elif stored["body"]:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(ctx.http.pool, read_capped, response)
+        else:
+            body = None
+            response.close()
+        ctx.http.observe(method, url, response, body)
+        current = ctx.http.observed[(method, url)]
+        return current["fingerprint"] == stored["fingerprint"], current
+
+    async def revalidate(self, ctx, previous):
+        """
+        Revalidates every resource the last full scan read (landing page,
+        robots.txt, OPTIONS probes, crawled pages), not just the landing
+        page: findings come from headers and from other URLs too. Returns
+        (unchanged, validators); unchanged only if every resource answered
+        304 or with the same status, security headers and body.
+        """
+        if not previous or not previous["resources"]:
+            return False, {}
+        keys = list(previous["resources"])
+        results = await asyncio.gather(
+            *(self.revalidate_resource(ctx, key, previous["resources"][key]) for key in keys),
+            return_exceptions=True)
+        if any(isinstance(result, BaseException) for result in results):
+            return False, {}
+        resources = {key: current for key, (_, current) in zip(keys, results)}
+        return all(same for same, _ in results), self.validators(ctx, resources)
+
+    def validators(self, ctx, resources):
+        landing = resources.get(f"GET {ctx.target}") or {}
+        return {
+            "etag": landing.get("etag"),
+            "last_modified": landing.get("last_modified"),
+            "body_hash": landing.get("fingerprint"),
+            "resources": resources
+        }
+
+    async def run_checks(self, ctx, on_check):
+        await self.prefetch(ctx)
+        for check in self.checks:
+            before = len(ctx.report["findings"])
+            try:
+                await check(ctx)
+            except Exception as e:
+                print(f"[!] {check.__name__} failed on {ctx.target}: {e}", file=sys.stderr)
+            new_findings = ctx.report["findings"][before:]
+            for finding in new_findings:
+                finding.setdefault("check", getattr(check, "check_name", check.__name__))
+            if on_check:
+                on_check(ctx.report, check, new_findings)
+
+    async def scan_target(self, target, semaphore, on_check=None):
+        async with semaphore:
+            ctx = ScanContext(target, self)
+            try:
+                if self.state is None:
+                    await self.run_checks(ctx, on_check)
+                else:
+                    await self.scan_with_state(ctx, on_check)
+            finally:
+                ctx.http.close()
+            ctx.report["network"] = ctx.http.stats()
+            return ctx.report
+
+    async def scan_with_state(self, ctx, on_check):
+        previous = self.state.get(ctx.target)
+        try:
+            unchanged, validators = await self.revalidate(ctx, previous)
+        except Exception:
+            unchanged, validators = False, {}
+
+        # only compare against checks that are part of this run
+        ran = {getattr(check, "check_name", check.__name__) for check in self.checks}
+        baseline = [f for f in (previous["findings"] if previous else []) if f.get("check") in ran]
+        ctx.report["baseline"] = baseline
+
+        if unchanged and not self.force_full and not self.state.expired(previous):
+            ctx.report["findings"] = previous["findings"]
+            ctx.report["unchanged"] = previous["scanned_at"]
+            ctx.report["changes"] = {"added": [], "resolved": []}
+            self.state.save(ctx.target, validators, previous["findings"], full_scan=False)
+            return
+
+        await self.run_checks(ctx, on_check)
+        validators = self.validators(ctx, {f"{method} {url}": entry
+                                           for (method, url), entry in ctx.http.observed.items()})
+        added, resolved = diff_findings(baseline, ctx.report["findings"])
+        ctx.report["changes"] = {"added": added, "resolved": resolved}
+        # keep what checks left out of this run found last time
+        kept = [f for f in (previous["findings"] if previous else []) if f.get("check") not in ran]
+        self.state.save(ctx.target, validators, ctx.report["findings"] + kept, full_scan=True)
+
+    async def run(self, targets, on_report=None, on_check=None):
+        """on_check(report, check, new_findings) fires after every check, on_report after every target."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reports = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            self.pool = pool
+            tasks = [asyncio.create_task(self.scan_target(target, semaphore, on_check)) for target in targets]
+            for finished in asyncio.as_completed(tasks):
+                report = await finished
+                reports.append(report)
+                if on_report:
+                    on_report(report)
+        self.pool = None
+        return reports
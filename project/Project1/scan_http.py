@@ -0,0 +1,144 @@
+import asyncio
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from scan_state import resource_validators
+
+MAX_BODY_BYTES = 2 * 1024 * 1024  # body read from a streamed response; the rest is ignored
+
+
+# ==========================
+# RESOURCE DECLARATIONS
+# ==========================
+def needs(*resources):
+    """
+    Declares the (method, path) pairs a check reads, relative to the target.
+    The engine fetches them all up front, once, before the checks run.
+    Example: @needs(("GET", ""), ("GET", "/robots.txt"))
+    """
+    def decorate(check):
+        check.resources = list(resources)
+        return check
+    return decorate
+
+
+def read_capped(response, limit=MAX_BODY_BYTES):
+    """Up to `limit` bytes of a streamed response's body; the connection is released either way."""
+    try:
+        body = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            body += chunk
+            if len(body) >= limit:
+                break
+        return bytes(body[:limit])
+    finally:
+        response.close()
+
+
+# ==========================
+# PER-SCAN HTTP LAYER
+# ==========================
+class ScanSession:
+    """
+    One keep-alive session per target scan, with a response cache keyed by
+    (method, URL). Concurrent callers asking for the same URL wait on the
+    same in-flight request, and parsed HTML is cached alongside so checks
+    share one DOM. Requests with extra options, or cache=False (crawled
+    pages), bypass the cache.
+
+    Validators of every response the checks read are collected in
+    `observed` for the scan-state store (scan_state.py). Requests with
+    custom headers (conditional revalidation) are not recorded, and a
+    streamed response is recorded without its body until the reader
+    passes the bytes it read to observe().
+    """
+
+    def __init__(self, pool, limiter, timeout, pool_size=10):
+        self.pool = pool
+        self.limiter = limiter
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.responses = {}
+        self.soups = {}
+        self.requests_made = 0
+        self.lookups = 0  # requests the checks asked for, cached or not
+        self.observed = {}
+
+    async def _send(self, method, url, **kwargs):
+        await self.limiter.wait(urlsplit(url).netloc)
+        kwargs.setdefault("timeout", self.timeout)
+        self.requests_made += 1
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self.pool, partial(self.session.request, method, url, **kwargs))
+        if "headers" not in kwargs:
+            self.observe(method, url, response, None if kwargs.get("stream") else response.content[:MAX_BODY_BYTES])
+        return response
+
+    def observe(self, method, url, response, body=None):
+        self.observed[(method.upper(), url)] = resource_validators(response, body)
+
+    async def _shared(self, cache, key, make):
+        """Run make() once per key; later callers await the same result."""
+        while key in cache:
+            pending = cache[key]
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # re-raise our own cancellation; if it was the first caller that
+                # got cancelled, its entry is gone and we make() it ourselves
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+        future = asyncio.get_running_loop().create_future()
+        cache[key] = future
+        try:
+            result = await make()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved so unused failures aren't logged
+            raise
+        except BaseException:
+            # cancelled (or interrupted): waiters must not hang on a future nobody
+            # will resolve, and the next caller should try again
+            future.cancel()
+            if cache.get(key) is future:
+                del cache[key]
+            raise
+        future.set_result(result)
+        return result
+
+    async def fetch(self, method, url, prefetch=False, cache=True, **kwargs):
+        method = method.upper()
+        if not prefetch:
+            self.lookups += 1
+        if kwargs or not cache:
+            return await self._send(method, url, **kwargs)
+        return await self._shared(self.responses, (method, url), lambda: self._send(method, url))
+
+    def remember(self, method, url, response):
+        """Put a response fetched elsewhere (e.g. a conditional request) into the cache."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(response)
+        self.responses[(method.upper(), url)] = future
+
+    async def soup(self, url):
+        if url in self.soups:
+            self.lookups += 1
+
+        async def parse():
+            response = await self.fetch("GET", url)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, BeautifulSoup, response.text, "html.parser")
+        return await self._shared(self.soups, url, parse)
+
+    def stats(self):
+        return {"requests": self.requests_made, "saved": max(0, self.lookups - self.requests_made)}
+
+    def close(self):
+        self.session.close()
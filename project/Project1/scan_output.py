@@ -0,0 +1,187 @@
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+
+RISK_LEVELS = ["High", "Medium", "Low", "Informational"]
+SARIF_LEVELS = {"High": "error", "Medium": "warning", "Low": "note", "Informational": "note"}
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def _open(path, mode):
+    return sys.stdout if path == "-" else open(path, mode, encoding="utf-8")
+
+
+# ==========================
+# NDJSON
+# ==========================
+class NdjsonWriter:
+    """One JSON object per line, flushed as soon as a check finishes."""
+
+    def __init__(self, path, append=False):
+        self.handle = _open(path, "a" if append else "w")
+
+    def _write(self, record):
+        self.handle.write(json.dumps(record) + "\n")
+        self.handle.flush()
+
+    def findings(self, report, check_name, findings, baseline_state=None):
+        for finding in findings:
+            record = {"type": "finding", "target": report["target"], "date": report["date"],
+                      "check": check_name, **finding}
+            if baseline_state:
+                record["baseline_state"] = baseline_state
+            self._write(record)
+
+    def resolved(self, report, check_name, findings):
+        for finding in findings:
+            self._write({"type": "resolved", "target": report["target"], "date": report["date"],
+                         "check": check_name, **finding})
+
+    def target_done(self, report):
+        record = {"type": "target", "target": report["target"], "findings": len(report["findings"])}
+        if report.get("unchanged"):
+            record["unchanged_since"] = report["unchanged"]
+        for key in ("network", "crawl"):
+            if key in report:
+                record[key] = report[key]
+        self._write(record)
+
+    def summary(self, summary):
+        self._write({"type": "summary", "targets": summary.as_dict()})
+
+    def close(self):
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+
+# ==========================
+# SARIF
+# ==========================
+class SarifWriter:
+    """
+    SARIF 2.1.0 written incrementally: the rule table (from the registry)
+    goes out first, each result is appended as it arrives and the document
+    is closed in close(). The file only covers targets scanned in this run.
+    """
+
+    def __init__(self, path, checks, tool_name="mini-pentest"):
+        self.handle = _open(path, "w")
+        self.first = True
+        rules = [{
+            "id": check.check_name,
+            "shortDescription": {"text": check.description or check.check_name},
+            "defaultConfiguration": {"level": SARIF_LEVELS.get(check.default_risk, "note")}
+        } for check in checks]
+        header = json.dumps({
+            "version": "2.1.0",
+            "$schema": SARIF_SCHEMA,
+            "runs": [{"tool": {"driver": {"name": tool_name, "rules": rules}}, "results": []}]
+        })
+        # everything up to the empty results array, which stays open
+        self.handle.write(header[:header.rindex('"results": [') + len('"results": [')])
+        self.handle.flush()
+
+    def findings(self, report, check_name, findings, baseline_state=None):
+        for finding in findings:
+            result = {
+                "ruleId": check_name,
+                "level": SARIF_LEVELS.get(finding["risk"], "note"),
+                "message": {"text": f"{finding['title']}: {finding['description']}"},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": report["target"]}}}],
+                "properties": {"risk": finding["risk"], "recommendation": finding["recommendation"]}
+            }
+            if baseline_state:
+                result["baselineState"] = baseline_state
+            self.handle.write(("" if self.first else ",") + "\n" + json.dumps(result))
+            self.first = False
+        self.handle.flush()
+
+    def resolved(self, report, check_name, findings):
+        self.findings(report, check_name, findings, baseline_state="absent")
+
+    def target_done(self, report):
+        pass
+
+    def summary(self, summary):
+        pass
+
+    def close(self):
+        self.handle.write("\n]}]}\n")
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+
+# ==========================
+# AGGREGATE SUMMARY
+# ==========================
+class RiskSummary:
+    """Finding counts by risk level for every target."""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+
+    def add(self, target, findings):
+        self.counts[target].update(finding["risk"] for finding in findings)
+
+    def load_ndjson(self, path):
+        """
+        Pick up counts from a previous, interrupted run's NDJSON output. Only
+        targets with a closing "target" record count; findings streamed for a
+        target that was cut off will be written again when it is rescanned.
+        """
+        if not os.path.exists(path):
+            return
+        pending = defaultdict(Counter)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # half-written last line from the interruption
+                if record.get("type") == "finding":
+                    pending[record["target"]][record["risk"]] += 1
+                elif record.get("type") == "target":
+                    self.counts[record["target"]] = pending.pop(record["target"], Counter())
+
+    def as_dict(self):
+        return {target: {risk: counts.get(risk, 0) for risk in RISK_LEVELS}
+                for target, counts in self.counts.items()}
+
+    def print_summary(self, file=None):
+        totals = Counter()
+        for counts in self.counts.values():
+            totals.update(counts)
+        print("\n=== SCAN SUMMARY ===", file=file)
+        print(f"Targets: {len(self.counts)}", file=file)
+        for risk in RISK_LEVELS:
+            print(f"  {risk}: {totals.get(risk, 0)}", file=file)
+        worst = sorted(self.counts.items(), key=lambda item: [-item[1].get(r, 0) for r in RISK_LEVELS])[:10]
+        if worst:
+            print("\nMost exposed targets:", file=file)
+            for target, counts in worst:
+                print(f"  {target}  " + "  ".join(f"{risk}={counts.get(risk, 0)}" for risk in RISK_LEVELS),
+                      file=file)
+
+
+# ==========================
+# RESUME FILE
+# ==========================
+class ResumeLog:
+    """Append-only list of finished targets; a restarted scan skips them."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self.handle = open(path, "a", encoding="utf-8")
+
+    def mark(self, target):
+        self.handle.write(target + "\n")
+        self.handle.flush()
+        self.done.add(target)
+
+    def close(self):
+        self.handle.close()
@@ -0,0 +1,40 @@
+import importlib
+
+# ==========================
+# CHECK REGISTRY
+# ==========================
+# name -> check coroutine. Checks register themselves with @register_check,
+# so a plugin module only has to be imported to take part in the scan.
+REGISTRY = {}
+
+
+def register_check(name, description="", order=100, default_risk="Informational"):
+    """
+    Registers a check coroutine `async def check(ctx)` with metadata used for
+    ordering (lower runs first), --list-checks and the SARIF rule table.
+    """
+    def decorate(check):
+        if name in REGISTRY:
+            raise ValueError(f"Check already registered: {name}")
+        check.check_name = name
+        check.description = description or (check.__doc__ or "").strip()
+        check.order = order
+        check.default_risk = default_risk
+        REGISTRY[name] = check
+        return check
+    return decorate
+
+
+def load_plugins(modules):
+    """Import plugin modules by name; their @register_check calls do the rest."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def select_checks(only=None, skip=None):
+    unknown = [name for name in (only or []) + (skip or []) if name not in REGISTRY]
+    if unknown:
+        raise SystemExit(f"Unknown check(s): {', '.join(unknown)}. Use --list-checks to see them.")
+    names = only or list(REGISTRY)
+    checks = [REGISTRY[name] for name in names if name not in (skip or [])]
+    return sorted(checks, key=lambda check: check.order)
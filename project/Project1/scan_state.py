@@ -0,0 +1,126 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+
+# ==========================
+# PERSISTENT SCAN STATE
+# ==========================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_state (
+    target        TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    body_hash     TEXT,
+    scanned_at    TEXT NOT NULL,   -- last full analysis
+    checked_at    TEXT NOT NULL,   -- last visit, conditional or not
+    findings      TEXT NOT NULL,   -- JSON list from the last full analysis
+    resources     TEXT             -- JSON {"METHOD url": validators} of everything the checks read
+)
+"""
+
+# Response headers the checks read; a change in any of them is a change of the resource
+VALIDATED_HEADERS = [
+    "Server",
+    "X-Frame-Options",
+    "X-Content-Type-Options",
+    "Content-Security-Policy",
+    "Strict-Transport-Security",
+    "Allow",
+    "Content-Type",
+    "Location",
+]
+
+
+def fingerprint(response, body=None):
+    """Hash of the status, VALIDATED_HEADERS and (if given) the body of a response."""
+    digest = hashlib.sha256(str(response.status_code).encode())
+    for header in VALIDATED_HEADERS:
+        digest.update(f"\n{header}: {response.headers.get(header, '')}".encode())
+    if body is not None:
+        digest.update(b"\n\n" + body)
+    return digest.hexdigest()
+
+
+def resource_validators(response, body=None):
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fingerprint": fingerprint(response, body),
+        "body": body is not None
+    }
+
+
+def finding_key(finding):
+    return finding.get("check"), finding["title"], finding["description"]
+
+
+def diff_findings(previous, current):
+    """(added, resolved) between two finding lists, matched on check, title and description."""
+    before = {finding_key(f): f for f in previous}
+    after = {finding_key(f): f for f in current}
+    added = [f for key, f in after.items() if key not in before]
+    resolved = [f for key, f in before.items() if key not in after]
+    return added, resolved
+
+
+class ScanStateStore:
+    """
+    SQLite store of per-target response validators and the findings of
+    the last full scan, so a nightly run can send conditional requests and
+    skip re-analysing hosts that haven't changed. Validators are kept for
+    every resource the checks read (landing page, robots.txt, OPTIONS
+    probes, crawled pages): ETag, Last-Modified and a fingerprint of the
+    status, the security-relevant headers and the body.
+    """
+
+    def __init__(self, path, max_age_days=7):
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(scan_state)")}
+        if "resources" not in columns:
+            # stores from before per-resource validators: those targets get one full scan
+            self.db.execute("ALTER TABLE scan_state ADD COLUMN resources TEXT")
+        self.max_age = datetime.timedelta(days=max_age_days) if max_age_days else None
+
+    def get(self, target):
+        row = self.db.execute("SELECT * FROM scan_state WHERE target = ?", (target,)).fetchone()
+        if row is None:
+            return None
+        state = dict(row)
+        state["findings"] = json.loads(state["findings"])
+        state["resources"] = json.loads(state["resources"]) if state["resources"] else None
+        return state
+
+    def expired(self, state):
+        """Past max age a full scan is forced even if the host looks unchanged."""
+        if self.max_age is None:
+            return False
+        scanned_at = datetime.datetime.fromisoformat(state["scanned_at"])
+        return datetime.datetime.now() - scanned_at > self.max_age
+
+    def save(self, target, validators, findings, full_scan):
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        values = (validators.get("etag"), validators.get("last_modified"), validators.get("body_hash"),
+                  json.dumps(validators.get("resources")))
+        if full_scan:
+            self.db.execute(
+                "INSERT OR REPLACE INTO scan_state "
+                "(target, etag, last_modified, body_hash, resources, scanned_at, checked_at, findings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (target, *values, now, now, json.dumps(findings))
+            )
+        else:
+            # unchanged: keep the findings, but store the validators the server sent this time
+            self.db.execute(
+                "UPDATE scan_state SET etag = ?, last_modified = ?, body_hash = ?, resources = ?, checked_at = ? "
+                "WHERE target = ?",
+                (*values, now, target)
+            )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
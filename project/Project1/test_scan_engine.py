@@ -0,0 +1,120 @@
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+
+from scan_engine import ScanEngine
+
+
+# ==========================
+# LOCAL STUB SERVER
+# ==========================
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every GET after `delay` seconds with the path as body, tracking requests in flight."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.times.append(time.monotonic())
+        try:
+            time.sleep(server.delay)
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def stub():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.in_flight = server.peak = 0
+    server.times = []
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# ==========================
+# TEST CHECKS
+# ==========================
+def make_check(requests_per_target=1):
+    async def echo(ctx):
+        for i in range(requests_per_target):
+            response = await ctx.request("GET", f"{ctx.target}r{i}", cache=False)
+            ctx.add_finding(title=response.text, risk="Low", description=ctx.target, recommendation="-")
+    echo.check_name = "echo"
+    return echo
+
+
+def run(engine, targets):
+    return asyncio.run(engine.run(targets))
+
+
+# ==========================
+# TESTS
+# ==========================
+def test_concurrency_caps_targets_in_flight(stub):
+    stub.delay = 0.2
+    targets = [f"{stub.url}/t{n}/" for n in range(6)]
+    engine = ScanEngine([make_check()], concurrency=2, per_host_rate=0)
+
+    reports = run(engine, targets)
+
+    assert len(reports) == 6
+    assert stub.peak == 2
+
+
+def test_per_host_rate_limit_spaces_requests(stub):
+    engine = ScanEngine([make_check(requests_per_target=6)], concurrency=1, per_host_rate=5)
+
+    run(engine, [f"{stub.url}/"])
+
+    gaps = [later - earlier for earlier, later in zip(stub.times, stub.times[1:])]
+    assert len(stub.times) == 6
+    # 5 requests per second: one every 0.2 s (a little slack for timer resolution)
+    assert min(gaps) >= 0.18
+    assert stub.times[-1] - stub.times[0] >= 0.95
+
+
+def test_rate_limit_is_per_host(stub):
+    # the same server under two host names is two hosts to the limiter
+    other = stub.url.replace("127.0.0.1", "localhost")
+    engine = ScanEngine([make_check(requests_per_target=3)], concurrency=2, per_host_rate=2)
+
+    started = time.monotonic()
+    run(engine, [f"{stub.url}/", f"{other}/"])
+
+    # 3 requests per host at 2/s take ~1 s; throttled together, 6 would take ~2.5 s
+    assert time.monotonic() - started < 2.0
+
+
+def test_reports_are_isolated_per_target(stub):
+    targets = [f"{stub.url}/a/", f"{stub.url}/b/", f"{stub.url}/c/"]
+    engine = ScanEngine([make_check(requests_per_target=2)], concurrency=3, per_host_rate=0)
+
+    reports = {report["target"]: report for report in run(engine, targets)}
+
+    assert set(reports) == set(targets)
+    for target, report in reports.items():
+        path = target[len(stub.url):]
+        assert [f["title"] for f in report["findings"]] == [f"{path}r0", f"{path}r1"]
+        assert all(f["description"] == target for f in report["findings"])
+        assert all(f["check"] == "echo" for f in report["findings"])
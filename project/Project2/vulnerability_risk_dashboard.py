@@ -1,4 +1,12 @@
+import argparse
 import csv
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from vulnerability_store import VulnerabilityStore
 
 # -----------------------------
 # STEP 1: Define risk weights
@@ -22,6 +30,24 @@ IMPACT_WEIGHTS = {
     "High": 3
 }
 
+# Ratings are stored as small ints: the position in LEVELS
+LEVELS = ["Low", "Medium", "High"]
+RATING_COLUMNS = ["severity", "likelihood", "impact"]
+DEFAULT_TOP = 50
+OUTPUT_FILE = "vulnerability_risk_dashboard.csv"
+CHUNK_ROWS = 50_000
+# High × High × Medium and above counts as high risk
+HIGH_RISK_SCORE = SEVERITY_WEIGHTS["High"] * LIKELIHOOD_WEIGHTS["High"] * IMPACT_WEIGHTS["Medium"]
+UNKNOWN_TYPE = "Unknown"
+EXPORT_HEADER = [
+    "Vulnerability Name",
+    "Type",
+    "Severity",
+    "Likelihood",
+    "Impact",
+    "Risk Score"
+]
+
 # -----------------------------
 # STEP 2: Sample vulnerability data
 # -----------------------------
@@ -65,49 +91,300 @@ vulnerabilities = [
 ]
 
 # -----------------------------
-# STEP 3: Calculate risk score
+# STEP 3: Load and encode findings
+# Scanner exports come as CSV or JSON (a list of objects or JSON lines)
+# with name, type, severity, likelihood and impact columns.
+# -----------------------------
+
+COLUMN_ALIASES = {
+    "vulnerability name": "name",
+    "title": "name",
+    "category": "type",
+}
+
+
+def load_findings(path=None):
+    if path is None:
+        df = pd.DataFrame(vulnerabilities)
+    elif path.endswith(".csv"):
+        df = pd.read_csv(path, dtype=str)
+    elif path.endswith((".jsonl", ".ndjson")):
+        df = pd.read_json(path, lines=True, dtype=False)
+    else:
+        with open(path) as f:
+            df = pd.DataFrame(json.load(f))
+
+    df.columns = [COLUMN_ALIASES.get(c.strip().lower(), c.strip().lower()) for c in df.columns]
+    missing = [c for c in ["name", "type"] + RATING_COLUMNS if c not in df.columns]
+    if missing:
+        raise SystemExit(f"Missing column(s) in {path}: {', '.join(missing)}")
+    df = df[["name", "type"] + RATING_COLUMNS].copy()
+    # An empty or missing type would factorize to -1 and break the per-type summaries
+    df["type"] = df["type"].fillna("").astype(str).str.strip().replace("", UNKNOWN_TYPE)
+    return df
+
+
+def encode_ratings(df):
+    """
+    Low/Medium/High -> 0/1/2 as int8 arrays, one per rating column.
+    Rows with an unknown rating are dropped (and counted) rather than guessed.
+    """
+    codes = {}
+    for column in RATING_COLUMNS:
+        text = df[column].astype(str).str.strip().str.capitalize()
+        codes[column] = pd.Categorical(text, categories=LEVELS).codes.astype(np.int8)
+
+    valid = np.ones(len(df), dtype=bool)
+    for column in RATING_COLUMNS:
+        valid &= codes[column] >= 0
+    dropped = int((~valid).sum())
+    if dropped:
+        print(f"Skipped {dropped} finding(s) with an unknown severity/likelihood/impact rating.")
+        df = df[valid].reset_index(drop=True)
+        codes = {column: values[valid] for column, values in codes.items()}
+    return df, codes
+
+
+# -----------------------------
+# STEP 4: Calculate risk score
 # Formula: Severity × Likelihood × Impact
+# All 27 combinations are precomputed, so scoring is one table lookup.
+# -----------------------------
+
+def weight_table():
+    severity = np.array([SEVERITY_WEIGHTS[level] for level in LEVELS])
+    likelihood = np.array([LIKELIHOOD_WEIGHTS[level] for level in LEVELS])
+    impact = np.array([IMPACT_WEIGHTS[level] for level in LEVELS])
+    return severity[:, None, None] * likelihood[None, :, None] * impact[None, None, :]
+
+
+def score(codes):
+    return weight_table()[codes["severity"], codes["likelihood"], codes["impact"]]
+
+
+# -----------------------------
+# STEP 5: Rank vulnerabilities by risk score (highest first)
+# Only the top k are sorted unless a full ranking is asked for. Ties keep
+# input order, the same as a stable sort of the whole list.
+# -----------------------------
+
+def rank(risk, top=None):
+    n = len(risk)
+    # unique key: higher risk first, then earlier rows first
+    key = risk.astype(np.int64) * n + (n - 1 - np.arange(n))
+    if top is None or top >= n:
+        return np.argsort(-key)
+    candidates = np.argpartition(-key, top - 1)[:top]
+    return candidates[np.argsort(-key[candidates])]
+
+
+# -----------------------------
+# STEP 6: Summaries
+# Per-type aggregates and a severity × likelihood heat map, built up
+# chunk by chunk from small-int arrays so the state never grows with the
+# inventory.
 # -----------------------------
 
-for vuln in vulnerabilities:
-    severity_score = SEVERITY_WEIGHTS[vuln["severity"]]
-    likelihood_score = LIKELIHOOD_WEIGHTS[vuln["likelihood"]]
-    impact_score = IMPACT_WEIGHTS[vuln["impact"]]
+class RiskSummary:
+    def __init__(self, types):
+        self.types = types
+        self.count = np.zeros(len(types), dtype=np.int64)
+        self.risk_sum = np.zeros(len(types), dtype=np.int64)
+        self.risk_max = np.zeros(len(types), dtype=np.int64)
+        self.high = np.zeros(len(types), dtype=np.int64)
+        self.heatmap = np.zeros((len(LEVELS), len(LEVELS)), dtype=np.int64)
+
+    def add(self, type_codes, codes, risk):
+        n = len(self.types)
+        self.count += np.bincount(type_codes, minlength=n)
+        self.risk_sum += np.bincount(type_codes, weights=risk, minlength=n).astype(np.int64)
+        self.high += np.bincount(type_codes[risk >= HIGH_RISK_SCORE], minlength=n)
+        np.maximum.at(self.risk_max, type_codes, risk)
+        cells = codes["severity"].astype(np.int64) * len(LEVELS) + codes["likelihood"]
+        self.heatmap += np.bincount(cells, minlength=len(LEVELS) ** 2).reshape(len(LEVELS), len(LEVELS))
+
+    def by_type(self):
+        seen = self.count > 0
+        table = pd.DataFrame({
+            "Type": np.asarray(self.types)[seen],
+            "Count": self.count[seen],
+            "Max Risk": self.risk_max[seen],
+            "Mean Risk": (self.risk_sum[seen] / self.count[seen]).round(2),
+            "High Risk Share %": (self.high[seen] / self.count[seen] * 100).round(1),
+        })
+        return table.sort_values(["Max Risk", "Mean Risk"], ascending=False, ignore_index=True)
+
+    def heatmap_table(self):
+        table = pd.DataFrame(self.heatmap, index=LEVELS, columns=LEVELS)
+        table.index.name = "Severity \\ Likelihood"
+        return table
 
-    vuln["risk_score"] = severity_score * likelihood_score * impact_score
 
 # -----------------------------
-# STEP 4: Sort vulnerabilities by risk score (highest first)
+# STEP 7: Export to CSV / Parquet
+# Rows go out in sorted chunks. With --all no full sort is done: risk
+# scores are small ints, so each score's rows are taken in turn from the
+# highest down (a bucket sort that keeps input order for ties).
 # -----------------------------
 
-vulnerabilities.sort(key=lambda x: x["risk_score"], reverse=True)
+def iter_ranked_chunks(risk, order=None, chunk_rows=CHUNK_ROWS):
+    if order is not None:
+        for start in range(0, len(order), chunk_rows):
+            yield order[start:start + chunk_rows]
+        return
+    for level in np.flatnonzero(np.bincount(risk))[::-1]:
+        rows = np.flatnonzero(risk == level)
+        for start in range(0, len(rows), chunk_rows):
+            yield rows[start:start + chunk_rows]
+
+
+class CsvChunkWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+
+        # Header row
+        self.writer.writerow(EXPORT_HEADER)
+
+    def write(self, chunk):
+        # Data rows
+        self.writer.writerows(chunk.itertuples(index=False, name=None))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetChunkWriter:
+    """One row group per chunk; needs pyarrow."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.writer = None
+        self.path = path
+        self.pq = pq
+
+    def write(self, chunk):
+        table = self.pa.Table.from_pandas(chunk, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def export(df, codes, risk, order=None, path=OUTPUT_FILE):
+    """
+    Streams the ranked rows to CSV or Parquet (by extension) and returns the
+    RiskSummary. When every row is exported the summary is filled from the
+    same chunks; for a top-k export it covers the whole inventory.
+    """
+    type_codes, types = pd.factorize(df["type"])
+    summary = RiskSummary(list(types))
+    if order is not None:
+        summary.add(type_codes, codes, risk)
+
+    writer = ParquetChunkWriter(path) if path.endswith(".parquet") else CsvChunkWriter(path)
+    try:
+        for rows in iter_ranked_chunks(risk, order):
+            chunk = df.iloc[rows].copy()
+            chunk["risk_score"] = risk[rows].astype(int)
+            chunk.columns = EXPORT_HEADER
+            writer.write(chunk)
+            if order is None:
+                summary.add(type_codes[rows], {c: codes[c][rows] for c in RATING_COLUMNS}, risk[rows])
+    finally:
+        writer.close()
+    return summary
+
+
+def write_summaries(summary, path):
+    stem, ext = os.path.splitext(path)
+    by_type, heatmap = summary.by_type(), summary.heatmap_table()
+    if ext == ".parquet":
+        by_type.to_parquet(f"{stem}_by_type.parquet", index=False)
+        heatmap.to_parquet(f"{stem}_heatmap.parquet")
+    else:
+        by_type.to_csv(f"{stem}_by_type.csv", index=False)
+        heatmap.to_csv(f"{stem}_heatmap.csv")
+
+    print("\nRisk by type:")
+    print(by_type.to_string(index=False))
+    print("\nSeverity × Likelihood heat map:")
+    print(heatmap.to_string())
+
 
 # -----------------------------
-# STEP 5: Export to CSV
+# STEP 8: Persistent store (optional)
+# With --db the findings are upserted into SQLite; only changed rows are
+# re-scored and the store answers the top-N / by-type / changed queries.
 # -----------------------------
 
-with open("vulnerability_risk_dashboard.csv", "w", newline="") as file:
-    writer = csv.writer(file)
+def sync_store(path, df, codes, risk, prune=False):
+    store = VulnerabilityStore(path)
+    run = store.start_run()
+    rescored = store.set_weights(weight_table())
+    inserted, changed, unchanged, pruned = store.upsert(df, codes, risk, prune)
+
+    print(f"\nStore {path} (run {run}): {inserted} new, {changed} changed, {unchanged} unchanged"
+          + (f", {pruned} pruned" if prune else ""))
+    if rescored:
+        print(f"Weight table changed: re-scored {rescored} stored finding(s).")
+    return store
+
+
+def print_rows(title, rows):
+    print(f"\n{title}:")
+    if not rows:
+        print("  (none)")
+    for name, finding_type, severity, likelihood, impact, risk_score in rows:
+        print(f"  {risk_score:>3}  {name}  [{finding_type}]  "
+              f"{LEVELS[severity]}/{LEVELS[likelihood]}/{LEVELS[impact]}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score and rank vulnerabilities by Severity × Likelihood × Impact.")
+    parser.add_argument("-i", "--input", help="CSV, JSON or JSON-lines scanner export (default: built-in sample)")
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE, help="ends in .csv or .parquet")
+    parser.add_argument("-k", "--top", type=int, default=DEFAULT_TOP, help="rows to rank and export")
+    parser.add_argument("--all", action="store_true", help="export every finding, highest risk first")
+    parser.add_argument("--db", help="SQLite store to keep findings in between runs")
+    parser.add_argument("--prune", action="store_true", help="with --db, drop stored findings missing from this input")
+    parser.add_argument("--type", dest="finding_type", help="with --db, show the top findings of one type")
+    parser.add_argument("--changed", action="store_true", help="with --db, show findings changed in this run")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    df, codes = encode_ratings(load_findings(args.input))
+    risk = score(codes)
+    order = None if args.all else rank(risk, args.top)
+    summary = export(df, codes, risk, order, args.output)
+    write_summaries(summary, args.output)
+
+    exported = len(df) if order is None else len(order)
+    print(f"\nScored {len(df)} vulnerabilities, exported {exported}.")
 
-    # Header row
-    writer.writerow([
-        "Vulnerability Name",
-        "Type",
-        "Severity",
-        "Likelihood",
-        "Impact",
-        "Risk Score"
-    ])
+    if args.db:
+        store = sync_store(args.db, df, codes, risk, args.prune)
+        try:
+            limit = min(args.top, 20)
+            print_rows(f"Top {limit} in store", store.top(limit))
+            if args.finding_type:
+                print_rows(f"Top {limit} {args.finding_type}", store.top(limit, args.finding_type))
+            if args.changed:
+                print_rows(f"Changed in this run (top {limit})", store.changed(limit))
+        finally:
+            store.close()
+    print("Vulnerability Risk Dashboard created successfully.")
 
-    # Data rows
-    for vuln in vulnerabilities:
-        writer.writerow([
-            vuln["name"],
-            vuln["type"],
-            vuln["severity"],
-            vuln["likelihood"],
-            vuln["impact"],
-            vuln["risk_score"]
-        ])
 
-print("Vulnerability Risk Dashboard created successfully.")
+if __name__ == "__main__":
+    main()
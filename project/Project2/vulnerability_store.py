@@ -0,0 +1,177 @@
+import datetime
+import json
+import sqlite3
+
+# ==========================
+# PERSISTENT VULNERABILITY STORE
+# ==========================
+# Ratings are stored as their 0/1/2 codes (position in LEVELS) and the
+# 27-cell weight table lives in its own table, so a weight change is one
+# UPDATE over the findings instead of a loop in Python.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS risk_weights (
+    severity   INTEGER NOT NULL,
+    likelihood INTEGER NOT NULL,
+    impact     INTEGER NOT NULL,
+    score      INTEGER NOT NULL,
+    PRIMARY KEY (severity, likelihood, impact)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    severity    INTEGER NOT NULL,
+    likelihood  INTEGER NOT NULL,
+    impact      INTEGER NOT NULL,
+    risk_score  INTEGER NOT NULL,
+    changed_run INTEGER NOT NULL,   -- last run that inserted it or changed its score/ratings
+    UNIQUE (name, type)
+);
+CREATE INDEX IF NOT EXISTS idx_findings_type_risk ON findings (type, risk_score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_findings_risk ON findings (risk_score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_findings_changed ON findings (changed_run);
+"""
+
+SCORE_LOOKUP = """
+(SELECT score FROM risk_weights w
+ WHERE w.severity = findings.severity AND w.likelihood = findings.likelihood AND w.impact = findings.impact)
+"""
+
+# Each statement's changes() is its own count: the insert skips existing
+# keys, and the update only writes rows whose ratings or score differ, so
+# an unchanged finding costs a lookup and no write.
+INSERT_NEW = """
+INSERT INTO findings (name, type, severity, likelihood, impact, risk_score, changed_run)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name, type) DO NOTHING
+"""
+
+UPDATE_CHANGED = """
+UPDATE findings
+SET severity = ?, likelihood = ?, impact = ?, risk_score = ?, changed_run = ?
+WHERE name = ? AND type = ? AND (severity, likelihood, impact, risk_score) != (?, ?, ?, ?)
+"""
+
+PRUNE_UNSEEN = """
+DELETE FROM findings
+WHERE NOT EXISTS (SELECT 1 FROM temp.run_keys k WHERE k.name = findings.name AND k.type = findings.type)
+"""
+
+COLUMNS = "name, type, severity, likelihood, impact, risk_score"
+
+
+class VulnerabilityStore:
+    """
+    SQLite inventory of scored findings keyed on (name, type). Each sync is
+    a numbered run: new rows are inserted and only rows whose ratings or
+    score changed are rewritten, with a new changed_run that the "changed
+    since last run" query reads through its index.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(findings)")]
+        if "seen_run" in columns:  # stores created before the per-statement upsert
+            self.db.execute("ALTER TABLE findings DROP COLUMN seen_run")
+        self.run = None
+
+    def start_run(self):
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        self.run = self.db.execute("INSERT INTO runs (started_at) VALUES (?)", (now,)).lastrowid
+        return self.run
+
+    def set_weights(self, table):
+        """
+        Store the 3x3x3 score table. If it differs from the stored one every
+        finding is re-scored in a single set-based UPDATE; returns the number
+        of rows whose score changed.
+        """
+        encoded = json.dumps(table.tolist())
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'weights'").fetchone()
+        if row is not None and row[0] == encoded:
+            return 0
+
+        with self.db:
+            self.db.execute("DELETE FROM risk_weights")
+            self.db.executemany(
+                "INSERT INTO risk_weights VALUES (?, ?, ?, ?)",
+                ((s, l, i, int(table[s, l, i]))
+                 for s in range(table.shape[0]) for l in range(table.shape[1]) for i in range(table.shape[2]))
+            )
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('weights', ?)", (encoded,))
+            changed = self.db.execute(
+                f"UPDATE findings SET risk_score = {SCORE_LOOKUP}, changed_run = ? "
+                f"WHERE risk_score != {SCORE_LOOKUP}",
+                (self.run,)
+            ).rowcount
+        return changed
+
+    def upsert(self, df, codes, risk, prune=False):
+        """
+        Insert new findings and update the ones whose ratings or score
+        changed; a finding listed more than once counts once, with its last
+        values. With prune, stored findings missing from df are deleted.
+        Returns (inserted, changed, unchanged, pruned) counts.
+        """
+        latest = {}
+        for name, finding_type, *values in zip(
+            df["name"].tolist(), df["type"].tolist(),
+            codes["severity"].tolist(), codes["likelihood"].tolist(), codes["impact"].tolist(),
+            risk.tolist()
+        ):
+            latest[(name, finding_type)] = values
+
+        run = (self.run,)
+        with self.db:
+            inserted = self._changes(INSERT_NEW, (key + tuple(values) + run for key, values in latest.items()))
+            changed = self._changes(UPDATE_CHANGED, (tuple(values) + run + key + tuple(values)
+                                                     for key, values in latest.items()))
+            pruned = 0
+            if prune:
+                self.db.execute("CREATE TEMP TABLE IF NOT EXISTS run_keys (name TEXT, type TEXT, PRIMARY KEY (name, type))")
+                self.db.execute("DELETE FROM temp.run_keys")
+                self.db.executemany("INSERT INTO temp.run_keys VALUES (?, ?)", latest)
+                pruned = self.db.execute(PRUNE_UNSEEN).rowcount
+                self.db.execute("DELETE FROM temp.run_keys")
+
+        return inserted, changed, len(latest) - inserted - changed, pruned
+
+    def _changes(self, statement, rows):
+        """Runs statement for every row; returns the summed changes()."""
+        before = self.db.total_changes
+        self.db.executemany(statement, rows)
+        return self.db.total_changes - before
+
+    # ----- queries -----
+
+    def top(self, limit, finding_type=None):
+        if finding_type is None:
+            return self.db.execute(
+                f"SELECT {COLUMNS} FROM findings ORDER BY risk_score DESC, id LIMIT ?", (limit,)
+            ).fetchall()
+        return self.db.execute(
+            f"SELECT {COLUMNS} FROM findings WHERE type = ? ORDER BY risk_score DESC, id LIMIT ?",
+            (finding_type, limit)
+        ).fetchall()
+
+    def changed(self, limit, since=None):
+        """Findings inserted or re-scored since run `since` (default: the current run)."""
+        since = self.run if since is None else since
+        return self.db.execute(
+            f"SELECT {COLUMNS} FROM findings WHERE changed_run >= ? ORDER BY risk_score DESC, id LIMIT ?",
+            (since, limit)
+        ).fetchall()
+
+    def close(self):
+        self.db.close()
@@ -11,9 +11,17 @@ Identifies:
 Author: Aaron Viegas
 """
 
+import argparse
+import sys
+from contextlib import redirect_stdout
+
 import pandas as pd
 from datetime import datetime
 
+from incident_correlation import CorrelationEngine, correlate, read_events, timeline_frame, write_jsonl
+from incident_rules import run_rules
+from incident_timeline import TimelineWriter, store_events, timeline
+
 # -----------------------------
 # STEP 1 — Load Incident Logs
 # -----------------------------
@@ -21,7 +29,7 @@ from datetime import datetime
 def load_logs():
     """
     Simulated security event logs.
-    In a real scenario, this would come from a SIEM or log file.
+    Real SIEM exports are read in chunks by incident_correlation.read_events.
     """
     data = {
         "timestamp": [
@@ -67,30 +75,7 @@ def load_logs():
 
 
 # -----------------------------
-# STEP 2 — Analyze What Happened
-# -----------------------------
-
-def analyze_incident(df):
-    """
-    Determines the nature of the incident.
-    """
-    failed_logins = df[df["event_type"] == "Login Failure"]
-    success_logins = df[df["event_type"] == "Login Success"]
-    data_exfil = df[df["event_type"] == "Data Exfiltration"]
-
-    incident_summary = {
-        "failed_login_count": len(failed_logins),
-        "successful_login": not success_logins.empty,
-        "data_exfiltration": not data_exfil.empty,
-        "attacker_ip": df["source_ip"].mode()[0],
-        "target_user": df["user"].mode()[0],
-    }
-
-    return incident_summary
-
-
-# -----------------------------
-# STEP 3 — Detection Method
+# STEP 2 — Detection Method
 # -----------------------------
 
 def detection_method(summary):
@@ -106,7 +91,7 @@ def detection_method(summary):
 
 
 # -----------------------------
-# STEP 4 — Identify Failures
+# STEP 3 — Identify Failures
 # -----------------------------
 
 def identify_failures(summary):
@@ -125,7 +110,7 @@ def identify_failures(summary):
 
 
 # -----------------------------
-# STEP 5 — Prevention Measures
+# STEP 4 — Prevention Measures
 # -----------------------------
 
 def prevention_recommendations(failures):
@@ -143,7 +128,7 @@ def prevention_recommendations(failures):
 
 
 # -----------------------------
-# STEP 6 — Generate Incident Report
+# STEP 5 — Generate Incident Report
 # -----------------------------
 
 def generate_report(df, summary, detection, failures, recommendations):
@@ -151,7 +136,12 @@ def generate_report(df, summary, detection, failures, recommendations):
     print("=" * 40)
 
     print("\n📌 What Happened:")
-    print(f"Repeated login failures followed by unauthorized access and data exfiltration.")
+    happened = "Repeated login failures"
+    if summary["successful_login"]:
+        happened += " followed by unauthorized access"
+    if summary["data_exfiltration"]:
+        happened += " and data exfiltration"
+    print(happened + ".")
     print(f"Attacker IP: {summary['attacker_ip']}")
     print(f"Target Account: {summary['target_user']}")
 
@@ -170,24 +160,105 @@ def generate_report(df, summary, detection, failures, recommendations):
     print(df[["timestamp", "event_type", "severity"]])
 
 
+# -----------------------------
+# STEP 6 — Time-Windowed Rule Alerts
+# -----------------------------
+
+def print_alerts(alerts, event_count, limit=20):
+    print("\n🟦 DETECTION RULE ALERTS")
+    print("=" * 40)
+    print(f"{len(alerts)} alert(s) from {event_count} relevant event(s).")
+    if alerts.empty:
+        return
+
+    print("\n📌 Alerts per rule:")
+    print(alerts.groupby("rule", sort=False).size().to_string())
+
+    print(f"\n📊 First {min(limit, len(alerts))} alerts:")
+    print(alerts.head(limit).to_string(index=False))
+
+
+# -----------------------------
+# STEP 7 — Timeline Lookup
+# -----------------------------
+
+def print_timeline(store, ip=None, user=None, since=None, until=None):
+    events, (read, total) = timeline(store, ip=ip, user=user, start=since, end=until)
+    who = " / ".join(value for value in (ip, user) if value)
+    print(f"\n📊 Timeline for {who} ({len(events)} events, {read} of {total} partitions read):")
+    print(events.to_string(index=False))
+
+
 # -----------------------------
 # MAIN EXECUTION
 # -----------------------------
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Correlate SIEM events into incident reports.")
+    parser.add_argument("-i", "--input", help="CSV or JSON-lines export, optionally .gz (default: built-in sample)")
+    parser.add_argument("--min-failures", type=int, default=3, help="failed logins that make a brute force")
+    parser.add_argument("--idle-hours", type=float, default=24, help="close a chain after this long without events")
+    parser.add_argument("--reports", type=int, default=10, help="full reports to print; the rest are listed")
+    parser.add_argument("--jsonl", help="also write every incident as JSON lines ('-' for stdout)")
+    parser.add_argument("--rules", help="evaluate the time-windowed rules in this JSON file instead")
+    parser.add_argument("--alerts", help="with --rules, write every alert to this CSV")
+    parser.add_argument("--store", help="Parquet timeline store: events from --input are added to it")
+    parser.add_argument("--ip", help="with --store, print the timeline of this source IP")
+    parser.add_argument("--user", help="with --store, print the timeline of this user")
+    parser.add_argument("--since", help="timeline start, e.g. 2024-06-01")
+    parser.add_argument("--until", help="timeline end, e.g. 2024-06-30")
+    return parser.parse_args()
+
+
 def main():
-    logs = load_logs()
-    summary = analyze_incident(logs)
-    detection = detection_method(summary)
-    failures = identify_failures(summary)
-    recommendations = prevention_recommendations(failures)
-
-    generate_report(
-        logs,
-        summary,
-        detection,
-        failures,
-        recommendations
-    )
+    args = parse_args()
+    if args.store and (args.ip or args.user) and not args.input:
+        print_timeline(args.store, args.ip, args.user, args.since, args.until)
+        return
+
+    chunks = read_events(args.input) if args.input else [load_logs()]
+    if args.store:
+        chunks = store_events(chunks, TimelineWriter(args.store))
+    if args.rules:
+        alerts, event_count = run_rules(args.rules, chunks)
+        if args.alerts:
+            alerts.to_csv(args.alerts, index=False)
+        print_alerts(alerts, event_count)
+        return
+
+    engine = CorrelationEngine(args.min_failures, pd.Timedelta(hours=args.idle_hours))
+    out = None
+    if args.jsonl:
+        out = sys.stdout if args.jsonl == "-" else open(args.jsonl, "w")
+
+    # JSON lines on stdout stay machine-readable: the reports go to stderr
+    console = sys.stderr if out is sys.stdout else sys.stdout
+    count = 0
+    with redirect_stdout(console):
+        for summary in correlate(chunks, engine):
+            count += 1
+            if out:
+                write_jsonl([summary], out)
+            if count <= args.reports:
+                detection = detection_method(summary)
+                failures = identify_failures(summary)
+                recommendations = prevention_recommendations(failures)
+
+                generate_report(
+                    timeline_frame(summary),
+                    summary,
+                    detection,
+                    failures,
+                    recommendations
+                )
+            else:
+                print(f"- {summary['start']}  {summary['attacker_ip']} -> {summary['target_user']}  "
+                      f"failures={summary['failed_login_count']} access={summary['successful_login']} "
+                      f"exfiltration={summary['data_exfiltration']}")
+
+        if out and out is not sys.stdout:
+            out.close()
+        print(f"\n{count} incident(s) in {engine.events} event(s).")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+"""
+Streaming correlation for Incident Analysis.
+
+Reads SIEM exports (CSV or JSON lines, optionally gzip-compressed) in
+chunks and tracks every (source_ip, user) pair through
+failure -> success -> exfiltration, emitting one incident per attack
+chain instead of assuming the whole log is a single incident.
+"""
+
+import json
+
+import pandas as pd
+
+FAILURE = "Login Failure"
+SUCCESS = "Login Success"
+EXFILTRATION = "Data Exfiltration"
+
+COLUMNS = ["timestamp", "event_type", "source_ip", "user", "severity"]
+CHUNK_ROWS = 100_000
+MAX_TIMELINE = 50
+
+
+# -----------------------------
+# STEP 1 — Read Events in Chunks
+# -----------------------------
+
+def read_events(path, chunksize=CHUNK_ROWS):
+    """
+    Yields DataFrames of at most `chunksize` events with the five report
+    columns. The export is expected in time order (as SIEMs write them);
+    each chunk is sorted again in case of small local reordering.
+    """
+    lines = path.endswith((".jsonl", ".ndjson", ".jsonl.gz", ".ndjson.gz"))
+    if lines:
+        reader = pd.read_json(path, lines=True, chunksize=chunksize, dtype=False, compression="infer")
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize, dtype=str, compression="infer")
+
+    for chunk in reader:
+        chunk.columns = [c.strip().lower() for c in chunk.columns]
+        missing = [c for c in COLUMNS if c not in chunk.columns]
+        if missing:
+            raise SystemExit(f"Missing column(s) in {path}: {', '.join(missing)}")
+        chunk = chunk[COLUMNS].copy()
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], errors="coerce")
+        yield chunk.dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable")
+
+
+# -----------------------------
+# STEP 2 — Per-Key State Machine
+# -----------------------------
+
+class KeyState:
+    """Where one (source_ip, user) pair is in the attack chain. Times are epoch nanoseconds."""
+
+    __slots__ = ("failures", "compromised", "first_seen", "last_seen", "timeline")
+
+    def __init__(self, timestamp):
+        self.failures = 0
+        self.compromised = False
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.timeline = []
+
+    def record(self, timestamp, event_type, severity):
+        self.last_seen = timestamp
+        if len(self.timeline) < MAX_TIMELINE:
+            self.timeline.append((timestamp, event_type, severity))
+
+
+class CorrelationEngine:
+    """
+    Feeds events through a small state machine per (source_ip, user):
+
+        failures (>= min_failures) -> success -> exfiltration
+
+    A chain that reaches exfiltration is emitted straight away. A chain
+    that stops after the brute force or the compromise is emitted when the
+    key goes idle for `idle` or at the end of the input. Keys with no open
+    chain are dropped once idle, so memory follows the number of active
+    pairs, not the size of the log.
+    """
+
+    def __init__(self, min_failures=3, idle=pd.Timedelta(hours=24)):
+        self.min_failures = min_failures
+        self.idle = pd.Timedelta(idle).value
+        self.states = {}
+        self.events = 0
+        self.swept = None
+
+    def _summary(self, key, state, exfiltration):
+        source_ip, user = key
+        return {
+            "failed_login_count": state.failures,
+            "successful_login": state.compromised,
+            "data_exfiltration": exfiltration,
+            "attacker_ip": source_ip,
+            "target_user": user,
+            "start": pd.Timestamp(state.first_seen),
+            "end": pd.Timestamp(state.last_seen),
+            "timeline": [(pd.Timestamp(t), event_type, severity) for t, event_type, severity in state.timeline],
+        }
+
+    def _close(self, key, state):
+        """An idle or unfinished chain only counts once it got past the brute force."""
+        if state.failures >= self.min_failures:
+            return self._summary(key, state, exfiltration=False)
+        return None
+
+    def feed(self, chunk):
+        """Processes one chunk; returns the incidents completed in it."""
+        incidents = []
+        self.events += len(chunk)
+        relevant = chunk[chunk["event_type"].isin([FAILURE, SUCCESS, EXFILTRATION])]
+        # plain Python values: iterating pandas/arrow arrays row by row is several times slower
+        times = relevant["timestamp"].to_numpy("datetime64[ns]").view("int64").tolist()
+
+        for timestamp, event_type, source_ip, user, severity in zip(
+                times, relevant["event_type"].tolist(), relevant["source_ip"].tolist(),
+                relevant["user"].tolist(), relevant["severity"].tolist()):
+            key = (source_ip, user)
+            state = self.states.get(key)
+            if state is not None and timestamp - state.last_seen > self.idle:
+                closed = self._close(key, state)
+                if closed:
+                    incidents.append(closed)
+                state = None
+            if state is None:
+                if event_type != FAILURE:
+                    continue  # a clean login or transfer with no brute force in front of it
+                state = self.states[key] = KeyState(timestamp)
+
+            state.record(timestamp, event_type, severity)
+            if event_type == FAILURE:
+                if state.compromised:
+                    # new round of guessing after a login that led nowhere
+                    incidents.append(self._summary(key, state, exfiltration=False))
+                    state = self.states[key] = KeyState(timestamp)
+                    state.record(timestamp, event_type, severity)
+                state.failures += 1
+            elif event_type == SUCCESS:
+                if state.failures >= self.min_failures:
+                    state.compromised = True
+                else:
+                    del self.states[key]  # a few typos, then a normal login
+            elif state.compromised:
+                incidents.append(self._summary(key, state, exfiltration=True))
+                del self.states[key]
+
+        if times:
+            incidents.extend(self.expire(times[-1]))
+        return incidents
+
+    def expire(self, now):
+        """
+        Drops keys idle since before `now - idle`, returning any chains they
+        close. Sweeps at most once per idle period, so a key can linger up to
+        twice the idle time.
+        """
+        if self.swept is not None and now - self.swept < self.idle:
+            return []
+        self.swept = now
+        incidents = []
+        for key in [key for key, state in self.states.items() if now - state.last_seen > self.idle]:
+            closed = self._close(key, self.states.pop(key))
+            if closed:
+                incidents.append(closed)
+        return incidents
+
+    def flush(self):
+        """End of input: closes whatever chains are still open."""
+        incidents = [self._close(key, state) for key, state in self.states.items()]
+        self.states.clear()
+        return [incident for incident in incidents if incident]
+
+
+def correlate(chunks, engine=None):
+    """Runs every chunk through the engine, yielding incidents as they complete."""
+    engine = engine or CorrelationEngine()
+    for chunk in chunks:
+        yield from engine.feed(chunk)
+    yield from engine.flush()
+
+
+def timeline_frame(incident):
+    return pd.DataFrame(incident["timeline"], columns=["timestamp", "event_type", "severity"])
+
+
+def write_jsonl(incidents, handle):
+    for incident in incidents:
+        record = {key: value for key, value in incident.items() if key != "timeline"}
+        record["start"], record["end"] = str(record["start"]), str(record["end"])
+        handle.write(json.dumps(record) + "\n")
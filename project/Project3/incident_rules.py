@@ -0,0 +1,169 @@
+"""
+Time-windowed detection rules for Incident Analysis.
+
+Rules are declared in a JSON file (see detection_rules.json):
+
+    count: at least N events of one type within T, per key
+    then:  (optional) an event of another type within T2 after the Nth
+
+Each rule is evaluated over whole columns: events are sorted by key and
+time once, the count window is a shifted comparison and the "then" step is
+a single searchsorted, so there is no Python loop over events.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["source_ip", "user"]
+ALERT_COLUMNS = ["rule", "severity", "source_ip", "user", "first_seen", "last_seen", "events"]
+
+
+# -----------------------------
+# STEP 1 — Load Rules
+# -----------------------------
+
+def load_rules(path):
+    with open(path) as f:
+        rules = json.load(f)["rules"]
+
+    for rule in rules:
+        try:
+            rule.setdefault("key", KEY_COLUMNS)
+            rule.setdefault("severity", "Medium")
+            rule["count"]["within"] = pd.Timedelta(rule["count"]["within"])
+            rule["count"]["at_least"] = int(rule["count"]["at_least"])
+            if "then" in rule:
+                rule["then"]["within"] = pd.Timedelta(rule["then"]["within"])
+        except (KeyError, ValueError) as e:
+            raise SystemExit(f"Bad rule {rule.get('name', '?')} in {path}: {e}")
+        unknown = [column for column in rule["key"] if column not in KEY_COLUMNS]
+        if unknown or rule["count"]["at_least"] < 1:
+            raise SystemExit(f"Bad rule {rule['name']} in {path}: key must use {KEY_COLUMNS}, at_least >= 1")
+    return rules
+
+
+def rule_event_types(rules):
+    types = set()
+    for rule in rules:
+        types.add(rule["count"]["event_type"])
+        if "then" in rule:
+            types.add(rule["then"]["event_type"])
+    return types
+
+
+# -----------------------------
+# STEP 2 — Collect Events
+# -----------------------------
+
+def collect_events(chunks, event_types):
+    """
+    Keeps only the event types the rules look at, as one frame with
+    categorical event types and int64 nanosecond timestamps. A missing
+    source_ip or user becomes "", so those rows still get a group key.
+    """
+    kept = [chunk[chunk["event_type"].isin(event_types)] for chunk in chunks]
+    kept = [chunk for chunk in kept if len(chunk)]
+    if not kept:
+        return pd.DataFrame(columns=["timestamp", "event_type"] + KEY_COLUMNS)
+    events = pd.concat(kept, ignore_index=True)[["timestamp", "event_type"] + KEY_COLUMNS]
+    events[KEY_COLUMNS] = events[KEY_COLUMNS].fillna("")
+    events["event_type"] = events["event_type"].astype("category")
+    events["timestamp"] = events["timestamp"].to_numpy("datetime64[ns]").view("int64")
+    return events
+
+
+# -----------------------------
+# STEP 3 — Evaluate Rules
+# -----------------------------
+
+class RuleEngine:
+    def __init__(self, rules):
+        self.rules = rules
+        self._keys = {}
+
+    def _key_codes(self, events, columns):
+        columns = tuple(columns)
+        if columns not in self._keys:
+            self._keys[columns] = events.groupby(list(columns), sort=False, observed=True).ngroup().to_numpy()
+        return self._keys[columns]
+
+    def evaluate(self, events):
+        """Returns one DataFrame of alerts (ALERT_COLUMNS) across all rules."""
+        self._keys = {}
+        alerts = [self.evaluate_rule(rule, events) for rule in self.rules]
+        alerts = [frame for frame in alerts if len(frame)]
+        if not alerts:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        return pd.concat(alerts, ignore_index=True).sort_values("first_seen", kind="stable", ignore_index=True)
+
+    def evaluate_rule(self, rule, events):
+        keys = self._key_codes(events, rule["key"])
+        times = events["timestamp"].to_numpy()
+        count = rule["count"]
+        n = count["at_least"]
+
+        # A events sorted by (key, time)
+        rows_a = np.flatnonzero((events["event_type"] == count["event_type"]).to_numpy())
+        rows_a = rows_a[np.lexsort((times[rows_a], keys[rows_a]))]
+        key_a, time_a = keys[rows_a], times[rows_a]
+
+        # event i closes a window if the event n-1 places back has the same key and is within T
+        hit = np.zeros(len(rows_a), dtype=bool)
+        if len(rows_a) >= n:
+            back = n - 1
+            hit[back:] = (key_a[back:] == key_a[:len(key_a) - back]) & \
+                         (time_a[back:] - time_a[:len(time_a) - back] <= count["within"].value)
+        ends = np.flatnonzero(hit)
+        starts = ends - (n - 1)
+        last = time_a[ends]
+
+        if "then" in rule:
+            ends, starts, last = self._followed_by(rule["then"], events, keys, times, key_a, time_a, ends, starts)
+        else:
+            # one alert per burst: drop hits whose previous A event was also a hit on the same key
+            first = np.ones(len(ends), dtype=bool)
+            first[1:] = (ends[1:] != ends[:-1] + 1) | (key_a[ends[1:]] != key_a[ends[:-1]])
+            ends, starts, last = ends[first], starts[first], last[first]
+
+        source = events.iloc[rows_a[ends]]
+        return pd.DataFrame({
+            "rule": rule["name"],
+            "severity": rule["severity"],
+            "source_ip": source["source_ip"].to_numpy() if "source_ip" in rule["key"] else None,
+            "user": source["user"].to_numpy() if "user" in rule["key"] else None,
+            "first_seen": pd.to_datetime(time_a[starts]),
+            "last_seen": pd.to_datetime(last),
+            "events": n + ("then" in rule),
+        })
+
+    def _followed_by(self, then, events, keys, times, key_a, time_a, ends, starts):
+        """
+        Keeps hits followed by a `then` event on the same key within T2, one
+        alert per matched follow-up event (the earliest hit leading to it).
+        """
+        rows_b = np.flatnonzero((events["event_type"] == then["event_type"]).to_numpy())
+        rows_b = rows_b[np.lexsort((times[rows_b], keys[rows_b]))]
+        key_b, time_b = keys[rows_b], times[rows_b]
+
+        # (key, time) as one sortable int: key * R + rank of the time among all times
+        all_times = np.unique(times)
+        span = np.int64(len(all_times) + 1)
+        composite_b = key_b.astype(np.int64) * span + np.searchsorted(all_times, time_b)
+        composite_hit = key_a[ends].astype(np.int64) * span + np.searchsorted(all_times, time_a[ends])
+
+        follow = np.searchsorted(composite_b, composite_hit, side="left")
+        valid = follow < len(rows_b)
+        valid[valid] = (key_b[follow[valid]] == key_a[ends[valid]]) & \
+                       (time_b[follow[valid]] - time_a[ends[valid]] <= then["within"].value)
+        ends, starts, follow = ends[valid], starts[valid], follow[valid]
+
+        _, first = np.unique(follow, return_index=True)
+        return ends[first], starts[first], time_b[follow[first]]
+
+
+def run_rules(path, chunks):
+    rules = load_rules(path)
+    events = collect_events(chunks, rule_event_types(rules))
+    return RuleEngine(rules).evaluate(events), len(events)
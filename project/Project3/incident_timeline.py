@@ -0,0 +1,341 @@
+"""
+Columnar incident timeline store.
+
+Normalized events are kept as a Parquet dataset partitioned by day
+(root/day=YYYY-MM-DD/part-N.parquet) with dictionary-encoded event_type and
+severity and IPv4 addresses stored as integers. index.json holds, for each
+day, its time range, IP range and bloom filters over source_ip and user,
+so a timeline query for one attacker only opens the days that can match.
+Each part is added to the index as soon as it is finished, under a lock,
+so a crashed run keeps what it wrote and concurrent writers do not
+overwrite each other's entries.
+"""
+
+import base64
+import datetime
+import ipaddress
+import json
+import math
+import os
+import re
+import socket
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer only
+    fcntl = None
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".index.lock"
+DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+BLOOM_FALSE_POSITIVE = 0.01
+NO_IPV4 = -1
+
+
+# -----------------------------
+# STEP 1 — IP Encoding
+# -----------------------------
+
+def _ipv4(ip):
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        return NO_IPV4
+
+
+def ipv4_to_int(ips):
+    """IPv4 strings -> int64 (NO_IPV4 for IPv6 or anything unparsable), parsing each distinct address once."""
+    codes, uniques = pd.factorize(ips)
+    values = np.fromiter((_ipv4(ip) for ip in uniques), dtype=np.int64, count=len(uniques))
+    return np.where(codes >= 0, values[codes], NO_IPV4)
+
+
+def int_to_ipv4(values):
+    values = np.asarray(values, dtype=np.int64)
+    return [str(ipaddress.IPv4Address(int(v))) if v >= 0 else None for v in values]
+
+
+def _hashes(values):
+    return pd.util.hash_array(np.asarray(values, dtype=object)).astype(np.uint64)
+
+
+# -----------------------------
+# STEP 2 — Bloom Filter
+# -----------------------------
+
+class BloomFilter:
+    """Plain bit-array bloom filter; k positions come from double hashing one 64-bit hash."""
+
+    def __init__(self, bits, hashes, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = data if data is not None else np.zeros((bits + 7) // 8, dtype=np.uint8)
+
+    @classmethod
+    def for_count(cls, count, false_positive=BLOOM_FALSE_POSITIVE):
+        count = max(count, 1)
+        bits = max(64, int(-count * math.log(false_positive) / math.log(2) ** 2))
+        return cls(bits, max(1, round(bits / count * math.log(2))))
+
+    def _positions(self, hashes):
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        return ((h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.bits)).astype(np.int64)
+
+    def add(self, hashes):
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.data, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+
+    def __contains__(self, value):
+        positions = self._positions(_hashes([value]))[0]
+        return bool(((self.data[positions >> 3] >> (positions & 7)) & 1).all())
+
+    def to_json(self):
+        return {"bits": self.bits, "hashes": self.hashes, "data": base64.b64encode(self.data.tobytes()).decode()}
+
+    @classmethod
+    def from_json(cls, record):
+        data = np.frombuffer(base64.b64decode(record["data"]), dtype=np.uint8)
+        return cls(record["bits"], record["hashes"], data)
+
+
+# -----------------------------
+# STEP 3 — Writing the Store
+# -----------------------------
+
+def normalize(chunk):
+    """Events as stored: categorical types, int IPv4, IPv6/other addresses kept as text."""
+    ip = ipv4_to_int(chunk["source_ip"])
+    return pd.DataFrame({
+        "timestamp": chunk["timestamp"].to_numpy("datetime64[ns]"),
+        "event_type": chunk["event_type"].astype(str).astype("category"),
+        "severity": chunk["severity"].astype(str).astype("category"),
+        "ip": ip,
+        "ip_text": np.where(ip == NO_IPV4, chunk["source_ip"].astype(str), None),
+        "user": chunk["user"].astype(str).to_numpy(),
+    })
+
+
+def _widen(low, high, values):
+    low = int(values.min()) if low is None else min(low, int(values.min()))
+    high = int(values.max()) if high is None else max(high, int(values.max()))
+    return low, high
+
+
+@contextmanager
+def _index_lock(root):
+    with open(os.path.join(root, LOCK_FILE), "a") as handle:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _new_part(directory):
+    """Claims the next free part-N.parquet; creating it exclusively keeps concurrent writers apart."""
+    part = 0
+    while True:
+        path = os.path.join(directory, f"part-{part}.parquet")
+        try:
+            open(path, "x").close()
+            return path
+        except FileExistsError:
+            part += 1
+
+
+def _add_to_index(root, day, entry):
+    """Read-modify-write of index.json under the lock; the file is replaced atomically."""
+    with _index_lock(root):
+        index = load_index(root)
+        index.setdefault(day, []).append(entry)
+        path = os.path.join(root, INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+
+class _Partition:
+    def __init__(self, root, day):
+        directory = os.path.join(root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        self.path = _new_part(directory)
+        self.writer = None
+        self.rows = 0
+        self.min_ts = self.max_ts = None
+        self.ip_min = self.ip_max = None
+        self.ip_hashes = set()
+        self.user_hashes = set()
+
+    def write(self, frame):
+        table = pa.Table.from_pandas(frame, schema=TimelineWriter.schema(), preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+        times = frame["timestamp"].to_numpy().view("int64")
+        ips = frame["ip"].to_numpy()
+        ipv4 = ips[ips != NO_IPV4]
+        self.rows += len(frame)
+        self.min_ts, self.max_ts = _widen(self.min_ts, self.max_ts, times)
+        if len(ipv4):
+            self.ip_min, self.ip_max = _widen(self.ip_min, self.ip_max, ipv4)
+        ip_keys = np.where(ips != NO_IPV4, ips.astype(str), frame["ip_text"].to_numpy())
+        self.ip_hashes.update(np.unique(_hashes(ip_keys)).tolist())
+        self.user_hashes.update(np.unique(_hashes(frame["user"].to_numpy())).tolist())
+
+    def close(self):
+        self.writer.close()
+        blooms = {}
+        for name, hashes in (("ip", self.ip_hashes), ("user", self.user_hashes)):
+            bloom = BloomFilter.for_count(len(hashes))
+            bloom.add(np.fromiter(hashes, dtype=np.uint64, count=len(hashes)))
+            blooms[name] = bloom.to_json()
+        return {"path": os.path.basename(self.path), "rows": self.rows, "min_ts": self.min_ts, "max_ts": self.max_ts,
+                "ip_min": self.ip_min, "ip_max": self.ip_max, "bloom": blooms}
+
+
+class TimelineWriter:
+    """
+    Appends event chunks to the dataset. Input is expected roughly in time
+    order: a day's file stays open until a chunk starts on a later day.
+    Re-running on more logs adds new part files next to the old ones, and
+    several writers may add to the same store at once.
+    """
+
+    def __init__(self, root):
+        if pa is None:
+            raise SystemExit("The timeline store needs pyarrow: pip install pyarrow")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.open = {}
+
+    @staticmethod
+    def schema():
+        return pa.schema([
+            ("timestamp", pa.timestamp("ns")),
+            ("event_type", pa.dictionary(pa.int32(), pa.string())),
+            ("severity", pa.dictionary(pa.int32(), pa.string())),
+            ("ip", pa.int64()),
+            ("ip_text", pa.string()),
+            ("user", pa.string()),
+        ])
+
+    def append(self, chunk):
+        if chunk.empty:
+            return
+        frame = normalize(chunk)
+        days = frame["timestamp"].dt.strftime("%Y-%m-%d")
+        first_day = days.min()
+        for day in [day for day in self.open if day < first_day]:
+            self._close(day)
+        for day, rows in frame.groupby(days, sort=True).indices.items():
+            if day not in self.open:
+                self.open[day] = _Partition(self.root, day)
+            self.open[day].write(frame.iloc[rows])
+
+    def _close(self, day):
+        _add_to_index(self.root, day, self.open.pop(day).close())
+
+    def close(self):
+        for day in list(self.open):
+            self._close(day)
+
+
+def store_events(chunks, writer):
+    """Passes chunks through unchanged while writing them to the store."""
+    try:
+        for chunk in chunks:
+            writer.append(chunk)
+            yield chunk
+    finally:
+        writer.close()
+
+
+# -----------------------------
+# STEP 4 — Timeline Queries
+# -----------------------------
+
+def load_index(root):
+    path = os.path.join(root, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _may_contain(part, ip, ip_value, user, start, end):
+    if start is not None and part["max_ts"] < start:
+        return False
+    if end is not None and part["min_ts"] > end:
+        return False
+    if ip is not None:
+        if ip_value != NO_IPV4 and (part["ip_min"] is None or not part["ip_min"] <= ip_value <= part["ip_max"]):
+            return False
+        key = str(ip_value) if ip_value != NO_IPV4 else ip
+        if key not in BloomFilter.from_json(part["bloom"]["ip"]):
+            return False
+    if user is not None and user not in BloomFilter.from_json(part["bloom"]["user"]):
+        return False
+    return True
+
+
+def _end_bound(end):
+    """A date without a time (2024-06-03) means the whole day, up to its last nanosecond."""
+    stamp = pd.Timestamp(end)
+    date_only = (isinstance(end, str) and DATE_ONLY.fullmatch(end.strip())) or \
+        (isinstance(end, datetime.date) and not isinstance(end, datetime.datetime))
+    if date_only:
+        stamp += pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    return stamp.value
+
+
+def timeline(root, ip=None, user=None, start=None, end=None):
+    """
+    Events for one source IP and/or user between `start` and `end`
+    (anything pd.Timestamp accepts, both inclusive; a date-only `end`
+    includes that whole day), oldest first. Returns the frame and
+    (partitions read, partitions in the store).
+    """
+    if pa is None:
+        raise SystemExit("The timeline store needs pyarrow: pip install pyarrow")
+    start = pd.Timestamp(start).value if start is not None else None
+    end = _end_bound(end) if end is not None else None
+    ip_value = int(ipv4_to_int(pd.Series([ip]))[0]) if ip is not None else NO_IPV4
+
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("timestamp", "<=", pd.Timestamp(end)))
+    if ip is not None:
+        filters.append(("ip", "=", ip_value) if ip_value != NO_IPV4 else ("ip_text", "=", ip))
+    if user is not None:
+        filters.append(("user", "=", user))
+
+    index = load_index(root)
+    parts = [(day, part) for day, day_parts in sorted(index.items()) for part in day_parts]
+    selected = [os.path.join(root, f"day={day}", part["path"]) for day, part in parts
+                if _may_contain(part, ip, ip_value, user, start, end)]
+
+    tables = [pq.read_table(path, filters=filters or None) for path in selected]
+    if not tables:
+        frame = TimelineWriter.schema().empty_table().to_pandas()
+    else:
+        frame = pa.concat_tables(tables).to_pandas()
+    frame["source_ip"] = np.where(frame["ip"] != NO_IPV4, int_to_ipv4(frame["ip"]), frame["ip_text"])
+    frame = frame.drop(columns=["ip", "ip_text"]).sort_values("timestamp", kind="stable", ignore_index=True)
+    return frame[["timestamp", "event_type", "source_ip", "user", "severity"]], (len(selected), len(parts))
@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+
+from incident_rules import run_rules
+
+RULES = os.path.join(os.path.dirname(__file__), "detection_rules.json")
+
+
+def events(rows):
+    frame = pd.DataFrame(rows, columns=["timestamp", "event_type", "source_ip", "user", "severity"])
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+    return frame
+
+
+def brute_force(ip, user):
+    return [
+        ("2024-06-01 09:10", "Login Failure", ip, user, "Medium"),
+        ("2024-06-01 09:12", "Login Failure", ip, user, "Medium"),
+        ("2024-06-01 09:14", "Login Failure", ip, user, "Medium"),
+        ("2024-06-01 09:20", "Login Success", ip, user, "High"),
+    ]
+
+
+def test_brute_force_then_access():
+    alerts, count = run_rules(RULES, [events(brute_force("1.1.1.1", "admin"))])
+
+    assert count == 4
+    assert alerts["rule"].tolist() == ["brute-force-then-access"]
+
+
+def test_missing_key_value_still_alerts():
+    # a blank user column in the export arrives as NaN
+    chunk = events(brute_force("1.1.1.1", None) + brute_force("2.2.2.2", "admin"))
+
+    alerts, _ = run_rules(RULES, [chunk])
+
+    hits = alerts[alerts["rule"] == "brute-force-then-access"]
+    assert sorted(hits["source_ip"]) == ["1.1.1.1", "2.2.2.2"]
+    assert hits.set_index("source_ip").loc["1.1.1.1", "user"] == ""
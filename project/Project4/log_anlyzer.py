@@ -4,6 +4,7 @@
 # Purpose: Analyze security logs to identify suspicious activity
 # ================================
 
+import argparse
 from collections import defaultdict
 from datetime import datetime
 
@@ -13,6 +14,8 @@ from datetime import datetime
 
 LOG_FILE = "sample_logs.txt"
 FAILED_LOGIN_THRESHOLD = 5
+MEDIUM_RISK_FAILURES = 3
+REPORT_TOP = 20
 
 # -------------------------------
 # Data Structures
@@ -22,6 +25,10 @@ failed_logins = defaultdict(int)
 event_counts = defaultdict(int)
 suspicious_ips = set()
 
+# Set to a log_window.WindowDetector (--window) to judge failures per time
+# window instead of over the whole log
+window_detector = None
+
 # -------------------------------
 # Helper Functions
 # -------------------------------
@@ -34,8 +41,10 @@ def parse_log_line(line):
     [2025-01-10 12:45:23] 192.168.1.10 FAILED_LOGIN
     """
     try:
-        timestamp_part, ip, event = line.strip().split("] ")
+        timestamp_part, rest = line.strip().split("] ", 1)
+        ip, event = rest.split()
         timestamp = timestamp_part.replace("[", "")
+        datetime.fromisoformat(timestamp)  # a bad timestamp makes the line malformed
         return timestamp, ip, event
     except ValueError:
         return None, None, None
@@ -45,9 +54,14 @@ def assess_risk(ip):
     """
     Simple risk scoring logic
     """
-    if failed_logins[ip] >= FAILED_LOGIN_THRESHOLD:
+    if window_detector is not None:
+        failures = window_detector.peak_failures(ip)
+    else:
+        failures = failed_logins[ip]
+
+    if failures >= FAILED_LOGIN_THRESHOLD:
         return "HIGH"
-    elif failed_logins[ip] >= 3:
+    elif failures >= MEDIUM_RISK_FAILURES:
         return "MEDIUM"
     else:
         return "LOW"
@@ -57,47 +71,157 @@ def assess_risk(ip):
 # Main Analysis Logic
 # -------------------------------
 
-def analyze_logs():
-    with open(LOG_FILE, "r") as file:
-        for line in file:
-            timestamp, ip, event = parse_log_line(line)
+def analyze_logs(path=LOG_FILE):
+    with open(path, "r") as file:
+        analyze_records(parse_log_line(line) for line in file)
+
 
-            if not ip:
-                continue
+def analyze_records(records):
+    """Counts (timestamp, ip, event) records from any parser (see log_inputs)."""
+    for timestamp, ip, event in records:
+        if not ip:
+            continue
 
-            event_counts[ip] += 1
+        event_counts[ip] += 1
 
-            if event == "FAILED_LOGIN":
-                failed_logins[ip] += 1
+        if event == "FAILED_LOGIN":
+            failed_logins[ip] += 1
 
-                if failed_logins[ip] >= FAILED_LOGIN_THRESHOLD:
+            if window_detector is not None:
+                if window_detector.failure(ip, timestamp) >= FAILED_LOGIN_THRESHOLD:
                     suspicious_ips.add(ip)
+            elif failed_logins[ip] >= FAILED_LOGIN_THRESHOLD:
+                suspicious_ips.add(ip)
 
 
 # -------------------------------
 # Reporting
 # -------------------------------
 
-def generate_report():
+def generate_report(top=REPORT_TOP, sort="failures"):
+    """
+    Totals, then the `top` IPs ranked by failed logins (or events) and the
+    most active suspicious IPs. Only the top rows are sorted, so this stays
+    quick with millions of IPs; write_table (--output) has every IP.
+    """
+    from log_report import top_ips, top_suspicious, totals
+
     print("\n=== SECURITY LOG ANALYSIS REPORT ===\n")
+    print(f"Source IPs: {len(event_counts)}")
+    print(f"Total Events: {totals(event_counts)}")
+    print(f"Failed Logins: {totals(failed_logins)}")
 
-    for ip in event_counts:
-        risk = assess_risk(ip)
+    ranked = "failed logins" if sort == "failures" else "events"
+    print(f"\nTop {top} IPs by {ranked}:\n")
+    for ip, events, failures in top_ips(event_counts, failed_logins, top, by=sort):
         print(f"IP Address: {ip}")
-        print(f"  Total Events: {event_counts[ip]}")
-        print(f"  Failed Logins: {failed_logins[ip]}")
-        print(f"  Risk Level: {risk}")
+        print(f"  Total Events: {events}")
+        print(f"  Failed Logins: {failures}")
+        print(f"  Risk Level: {assess_risk(ip)}")
         print("-" * 40)
 
     print("\n=== SUSPICIOUS IP ADDRESSES ===")
-    for ip in suspicious_ips:
-        print(f"⚠ {ip} (Possible brute-force activity)")
+    for ip, failures in top_suspicious(suspicious_ips, failed_logins, top):
+        print(f"⚠ {ip} ({failures} failed logins, possible brute-force activity)")
+    if len(suspicious_ips) > top:
+        print(f"... and {len(suspicious_ips) - top} more")
+
+
+def generate_approx_report(state):
+    print("\n=== SECURITY LOG ANALYSIS REPORT (approximate) ===\n")
+    print(f"Distinct source IPs: ~{state.sources.count()}")
+    print(f"Total events: {state.events.total}")
+    print(f"Failed logins: {state.failures.total}")
+
+    print(f"\nTop {state.top_events.k} IPs by events (estimated):")
+    for ip, count in state.top_events.top(state.events):
+        print(f"  {ip}: {count}")
+
+    print("\n=== SUSPICIOUS IP ADDRESSES ===")
+    for ip, count in state.suspicious():
+        print(f"⚠ {ip} (~{count} failed logins, possible brute-force activity)")
 
 
 # -------------------------------
 # Entry Point
 # -------------------------------
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analyze security logs for suspicious activity.")
+    parser.add_argument("log_files", nargs="*", default=[LOG_FILE],
+                        help="log files or globs (rotated, .gz and .zst included)")
+    parser.add_argument("--format", choices=["auto", "custom", "syslog", "auth"], default="auto",
+                        help="line format, detected per file by default")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="parse in this many processes (byte ranges of one file, or one file each)")
+    parser.add_argument("-f", "--follow", action="store_true",
+                        help="keep reading as the log grows (survives rotation); Ctrl-C prints the report")
+    parser.add_argument("--checkpoint", help="with --follow, save offset and counters here and resume from it")
+    parser.add_argument("--window", type=int, metavar="SECONDS",
+                        help="count failed logins per IP within this sliding window instead of in total")
+    parser.add_argument("--state", choices=["dict", "compact", "approx"], default="dict",
+                        help="per-IP state: dicts, exact packed arrays, or fixed-size sketches")
+    parser.add_argument("--top", type=int, default=REPORT_TOP, metavar="K",
+                        help="IPs listed in the report")
+    parser.add_argument("--sort", choices=["failures", "events"], default="failures",
+                        help="rank the report by failed logins or by total events")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="write every IP to a .csv, .jsonl or .parquet table")
+    return parser.parse_args()
+
+
+def alert(ip, timestamp, count):
+    print(f"⚠ [{timestamp}] {ip} reached {count} failed logins (possible brute-force activity)", flush=True)
+
+
 if __name__ == "__main__":
-    analyze_logs()
-    generate_report()
+    from log_inputs import analyze_files, detect_format, expand_inputs, is_plain, iter_inputs
+
+    args = parse_args()
+    paths = expand_inputs(args.log_files)
+    if args.state != "dict" and (args.follow or args.window or args.workers > 1):
+        raise SystemExit("--state compact/approx is for batch runs without --follow, --window or --workers")
+    if args.window and args.workers > 1:
+        raise SystemExit("--window needs the lines in order; run it without --workers")
+    if args.follow and (len(paths) > 1 or not is_plain(paths[0])):
+        raise SystemExit("--follow takes one uncompressed log file")
+
+    if args.window:
+        from log_window import WindowDetector
+        window_detector = WindowDetector(args.window, FAILED_LOGIN_THRESHOLD)
+
+    if args.state == "approx":
+        from log_compact import ApproxState, analyze_approx
+        state = analyze_approx(iter_inputs(paths, args.format), ApproxState(FAILED_LOGIN_THRESHOLD))
+        generate_approx_report(state)
+        raise SystemExit
+    elif args.state == "compact":
+        from log_compact import CompactCounter, analyze_compact
+        event_counts, failed_logins = CompactCounter(), CompactCounter()
+        analyze_compact(iter_inputs(paths, args.format), event_counts, failed_logins, suspicious_ips,
+                        FAILED_LOGIN_THRESHOLD)
+    elif args.follow:
+        from log_follow import LogFollower
+        follower = LogFollower(paths[0], event_counts, failed_logins, suspicious_ips,
+                               FAILED_LOGIN_THRESHOLD, args.checkpoint, on_alert=alert,
+                               detector=window_detector)
+        if follower.restore():
+            print(f"Resuming {paths[0]} at byte {follower.offset}", flush=True)
+        follower.run()
+    elif args.workers > 1 and len(paths) == 1 and is_plain(paths[0]) and \
+            args.format in ("auto", "custom") and detect_format(paths[0]) == "custom":
+        from log_parallel import analyze_parallel
+        analyze_parallel(paths[0], args.workers, event_counts, failed_logins, suspicious_ips,
+                         FAILED_LOGIN_THRESHOLD)
+    elif args.workers > 1:
+        analyze_files(paths, args.format, args.workers, event_counts, failed_logins, suspicious_ips,
+                      FAILED_LOGIN_THRESHOLD)
+    else:
+        analyze_records(iter_inputs(paths, args.format))
+
+    generate_report(args.top, args.sort)
+    if args.output:
+        from log_report import write_table
+        rows = write_table(args.output, event_counts, failed_logins,
+                           window_detector.peak if window_detector is not None else None)
+        print(f"\nWrote {rows} rows to {args.output}")
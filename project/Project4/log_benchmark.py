@@ -0,0 +1,218 @@
+# ================================
+# Analyzer Benchmark
+# Times every analysis mode on one corpus and checks that they agree:
+#   analyze_logs   the original sequential loop over dicts
+#   parallel       byte ranges in worker processes (log_parallel)
+#   files          the corpus split into rotated files, one per worker
+#                  (log_inputs.analyze_files)
+#   compact        packed-array counters (log_compact)
+#   approx         fixed-size sketches (log_compact)
+# Each mode runs in a fresh process, so its peak RSS is its own; workers'
+# peaks are reported separately. Exact modes must match analyze_logs
+# counter for counter; approx must have exact totals, a distinct-source
+# estimate within 4 standard errors and flag the top failing IPs.
+# ================================
+
+import argparse
+import math
+import os
+import resource
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+MODES = ["analyze_logs", "parallel", "files", "compact", "approx"]
+CHECK_TOP = 10
+
+# -------------------------------
+# Modes (each runs in its own process)
+# -------------------------------
+
+def _peak_rss_mb(who):
+    if who == resource.RUSAGE_SELF:
+        # ru_maxrss survives exec, so a spawned child would report the parent's
+        # peak; VmHWM belongs to the process's own address space
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run_mode(mode, paths, workers):
+    """Returns (seconds, own peak RSS MB, workers' peak RSS MB, result)."""
+    import log_anlyzer
+    from log_anlyzer import FAILED_LOGIN_THRESHOLD
+
+    event_counts, failed_logins, suspicious_ips = defaultdict(int), defaultdict(int), set()
+    began = time.perf_counter()
+
+    if mode == "analyze_logs":
+        log_anlyzer.analyze_logs(paths[0])
+        event_counts, failed_logins = log_anlyzer.event_counts, log_anlyzer.failed_logins
+        suspicious_ips = log_anlyzer.suspicious_ips
+    elif mode == "parallel":
+        from log_parallel import analyze_parallel
+        analyze_parallel(paths[0], workers, event_counts, failed_logins, suspicious_ips,
+                         FAILED_LOGIN_THRESHOLD)
+    elif mode == "files":
+        from log_inputs import analyze_files
+        analyze_files(paths, "custom", workers, event_counts, failed_logins, suspicious_ips,
+                      FAILED_LOGIN_THRESHOLD)
+    elif mode == "compact":
+        from log_compact import CompactCounter, analyze_compact
+        from log_inputs import iter_inputs
+        event_counts, failed_logins = CompactCounter(), CompactCounter()
+        analyze_compact(iter_inputs(paths, "custom"), event_counts, failed_logins, suspicious_ips,
+                        FAILED_LOGIN_THRESHOLD)
+    elif mode == "approx":
+        from log_compact import ApproxState, analyze_approx
+        from log_inputs import iter_inputs
+        state = analyze_approx(iter_inputs(paths, "custom"), ApproxState(FAILED_LOGIN_THRESHOLD))
+        seconds = time.perf_counter() - began
+        result = {
+            "events": state.events.total,
+            "failed": state.failures.total,
+            "sources": state.sources.count(),
+            "std_error": 1.04 / math.sqrt(state.sources.m),
+            "suspicious": {ip for ip, count in state.suspicious()},
+        }
+        return seconds, _peak_rss_mb(resource.RUSAGE_SELF), _peak_rss_mb(resource.RUSAGE_CHILDREN), result
+    else:
+        raise ValueError(f"unknown mode {mode}")
+
+    seconds = time.perf_counter() - began
+    result = (dict(event_counts.items()), dict(failed_logins.items()), set(suspicious_ips))
+    return seconds, _peak_rss_mb(resource.RUSAGE_SELF), _peak_rss_mb(resource.RUSAGE_CHILDREN), result
+
+
+def measure(mode, paths, workers):
+    # spawn, not fork: the child must not inherit the parent's memory or counters
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_mode, mode, paths, workers).result()
+
+
+# -------------------------------
+# Correctness Checks
+# -------------------------------
+
+def check_exact(result, reference, planted):
+    event_counts, failed_logins, suspicious_ips = result
+    ref_events, ref_failed, ref_suspicious = reference
+    problems = []
+    if event_counts != ref_events:
+        differing = sum(1 for ip in ref_events.keys() | event_counts.keys()
+                        if event_counts.get(ip) != ref_events.get(ip))
+        problems.append(f"{differing} IPs with different event counts")
+    if {ip: n for ip, n in failed_logins.items() if n} != {ip: n for ip, n in ref_failed.items() if n}:
+        problems.append("failed-login counts differ")
+    if suspicious_ips != ref_suspicious:
+        problems.append(f"suspicious IPs differ ({len(suspicious_ips ^ ref_suspicious)})")
+    missed = set(planted) - suspicious_ips
+    if missed:
+        problems.append(f"{len(missed)} planted attackers not flagged")
+    return problems
+
+
+def check_approx(result, reference, planted):
+    ref_events, ref_failed, ref_suspicious = reference
+    problems = []
+    if result["events"] != sum(ref_events.values()):
+        problems.append("total events differ")
+    if result["failed"] != sum(ref_failed.values()):
+        problems.append("total failed logins differ")
+    error = abs(result["sources"] - len(ref_events)) / len(ref_events)
+    if error > 4 * result["std_error"]:
+        problems.append(f"distinct sources off by {error:.2%}")
+    top = sorted(ref_suspicious, key=lambda ip: -ref_failed[ip])[:CHECK_TOP]
+    missed = [ip for ip in top if ip not in result["suspicious"]]
+    if missed:
+        problems.append(f"{len(missed)} of the top {len(top)} failing IPs not flagged")
+    return problems
+
+
+# -------------------------------
+# Harness
+# -------------------------------
+
+def split_corpus(path, parts, directory):
+    """Copies of the corpus as `parts` rotated files (oldest first), for the files mode."""
+    size = os.path.getsize(path)
+    paths = []
+    with open(path, "rb") as source:
+        for part in range(parts):
+            target = os.path.join(directory, f"part-{part:03d}.log")
+            with open(target, "wb") as f:
+                f.write(source.read(size // parts if part < parts - 1 else size))
+                f.write(source.readline())  # finish the last line
+            paths.append(target)
+    return paths
+
+
+def benchmark(path, modes, workers, planted=()):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        lines = sum(block.count(b"\n") for block in iter(lambda: f.read(1 << 24), b""))
+
+    print(f"=== ANALYZER BENCHMARK: {path} ({lines:,} lines, {size / 2 ** 20:.1f} MB, "
+          f"{workers} workers, {os.cpu_count()} CPUs) ===\n")
+    print(f"{'mode':<14}{'seconds':>9}{'lines/s':>13}{'MB/s':>9}{'RSS MB':>9}{'workers MB':>12}  check")
+
+    reference = None
+    failures = 0
+    workdir = tempfile.mkdtemp(prefix="log_benchmark_")
+    try:
+        for mode in ["analyze_logs"] + [mode for mode in modes if mode != "analyze_logs"]:
+            paths = split_corpus(path, workers, workdir) if mode == "files" else [path]
+            seconds, rss, child_rss, result = measure(mode, paths, workers)
+
+            if mode == "analyze_logs":
+                reference = result
+                problems = check_exact(result, reference, planted)
+            elif mode == "approx":
+                problems = check_approx(result, reference, planted)
+            else:
+                problems = check_exact(result, reference, planted)
+            failures += bool(problems)
+
+            if mode in modes:
+                print(f"{mode:<14}{seconds:9.2f}{lines / seconds:13,.0f}{size / 2 ** 20 / seconds:9.1f}"
+                      f"{rss:9.0f}{child_rss:12.0f}  {'; '.join(problems) or 'ok'}")
+    finally:
+        shutil.rmtree(workdir)
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark and cross-check the log analyzer's modes.")
+    parser.add_argument("corpus", nargs="?", help="existing log to use; generated into a temp file if omitted")
+    parser.add_argument("-n", "--lines", type=int, default=2_000_000, help="lines to generate")
+    parser.add_argument("--ips", type=int, default=100_000, help="distinct sources to generate")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from log_generate import generate
+
+    args = parse_args()
+    if args.corpus:
+        failed = benchmark(args.corpus, args.modes, args.workers)
+    else:
+        with tempfile.TemporaryDirectory(prefix="log_corpus_") as directory:
+            corpus = os.path.join(directory, "corpus.log")
+            planted = generate(corpus, args.lines, args.ips)
+            failed = benchmark(corpus, args.modes, args.workers, planted)
+    raise SystemExit(1 if failed else 0)
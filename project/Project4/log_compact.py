@@ -0,0 +1,379 @@
+# ================================
+# Compact and Approximate IP State
+# Per-IP counters for very large numbers of distinct sources.
+#
+# compact (exact): IPv4 addresses packed into uint32 and kept in sorted
+#   numpy arrays with uint32 counts, about 8 bytes per IP against roughly
+#   95 for a dict entry with its string key. IPv6 and anything that is not
+#   an IPv4 address falls back to a small dict.
+#
+# approx: fixed memory whatever the number of sources.
+#   - Count-Min Sketch per counter. With width w = ceil(e / epsilon) and
+#     depth d = ceil(ln(1 / delta)), an estimate is never below the true
+#     count and is above it by more than epsilon * N (N = total counted)
+#     with probability at most delta. Defaults: epsilon = 1e-5, delta = 1e-3
+#     -> 271,829 x 7 uint32 cells, about 7.6 MB.
+#   - HyperLogLog for distinct sources, 2^p one-byte registers; standard
+#     error 1.04 / sqrt(2^p), i.e. about 0.8% with the default p = 14
+#     (16 KB).
+#   - Heavy hitters: k candidate IPs re-ranked by their sketch estimate
+#     after every batch, together with the IPs seen in that batch. An IP
+#     that keeps showing up stays in; one that dropped out and never
+#     reappears is lost, so this is a heuristic rather than a guarantee.
+#     Listed counts carry the sketch's error.
+#
+# Parsed lines are counted per batch in a plain dict, which bounds the
+# Python objects alive at any time to one batch.
+# ================================
+
+import hashlib
+import math
+import socket
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+BATCH_LINES = 1_000_000
+CMS_EPSILON = 1e-5
+CMS_DELTA = 1e-3
+HLL_PRECISION = 14
+TOP_K = 100
+
+# -------------------------------
+# IP Encoding and Hashing
+# -------------------------------
+
+def ipv4_to_int(ip):
+    """Packed IPv4 address, or -1 for IPv6 and anything else."""
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        return -1
+
+
+def int_to_ipv4(value):
+    return socket.inet_ntoa(int(value).to_bytes(4, "big"))
+
+
+def ints_to_ipv4(keys):
+    """Dotted strings for a uint32 array, from one big-endian buffer."""
+    packed = keys.astype(">u4").tobytes()
+    return list(map(socket.inet_ntoa, [packed[i:i + 4] for i in range(0, len(packed), 4)]))
+
+
+def _mix64(values):
+    """splitmix64 finalizer over a uint64 array."""
+    values = values.astype(np.uint64)
+    values ^= values >> np.uint64(30)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    values ^= values >> np.uint64(31)
+    return values
+
+
+def hash_ips(ips):
+    """64-bit hash per IP string: IPv4 goes through the integer mixer, the rest through blake2b."""
+    packed = np.fromiter((ipv4_to_int(ip) for ip in ips), dtype=np.int64, count=len(ips))
+    hashes = _mix64(packed.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15))
+    for i in np.flatnonzero(packed < 0):
+        hashes[i] = int.from_bytes(hashlib.blake2b(ips[i].encode(), digest_size=8).digest(), "big")
+    return hashes
+
+
+# -------------------------------
+# Exact: Sorted-Array Counter
+# -------------------------------
+
+class CompactCounter:
+    """
+    Exact per-IP counts in sorted parallel arrays. Works as a read-only
+    mapping (counter[ip], iteration, len), so generate_report can use it
+    in place of the defaultdicts. Counts are uint32 (up to ~4.29 billion
+    per IP).
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint32)
+        self.counts = np.empty(0, dtype=np.uint32)
+        self.other = {}
+
+    def add(self, batch):
+        """Merges a {ip: count} batch: one searchsorted and one insert per batch."""
+        keys, counts = [], []
+        for ip, count in batch.items():
+            packed = ipv4_to_int(ip)
+            if packed < 0:
+                self.other[ip] = self.other.get(ip, 0) + count
+            else:
+                keys.append(packed)
+                counts.append(count)
+        if not keys:
+            return
+
+        keys = np.array(keys, dtype=np.uint32)
+        counts = np.array(counts, dtype=np.uint32)
+        order = np.argsort(keys)
+        keys, counts = keys[order], counts[order]
+
+        at = np.searchsorted(self.keys, keys)
+        found = at < len(self.keys)
+        found[found] = self.keys[at[found]] == keys[found]
+        self.counts[at[found]] += counts[found]
+        new = ~found
+        self.keys = np.insert(self.keys, at[new], keys[new])
+        self.counts = np.insert(self.counts, at[new], counts[new])
+
+    def __getitem__(self, ip):
+        packed = ipv4_to_int(ip)
+        if packed < 0:
+            return self.other.get(ip, 0)
+        at = np.searchsorted(self.keys, packed)
+        if at < len(self.keys) and self.keys[at] == packed:
+            return int(self.counts[at])
+        return 0
+
+    def __contains__(self, ip):
+        return self[ip] > 0
+
+    def __iter__(self):
+        for key in self.keys:
+            yield int_to_ipv4(key)
+        yield from self.other
+
+    def __len__(self):
+        return len(self.keys) + len(self.other)
+
+    def items(self):
+        for key, count in zip(self.keys.tolist(), self.counts.tolist()):
+            yield int_to_ipv4(key), count
+        yield from self.other.items()
+
+    def aligned(self, other):
+        """other's counts for this counter's keys, in key order (0 where other has none)."""
+        at = np.searchsorted(other.keys, self.keys)
+        found = at < len(other.keys)
+        found[found] = other.keys[at[found]] == self.keys[found]
+        counts = np.zeros(len(self.keys), dtype=np.uint32)
+        counts[found] = other.counts[at[found]]
+        return counts
+
+    def at_least(self, threshold):
+        """IPs with count >= threshold, found with one vectorized comparison."""
+        ips = {int_to_ipv4(key) for key in self.keys[self.counts >= threshold]}
+        return ips | {ip for ip, count in self.other.items() if count >= threshold}
+
+
+# -------------------------------
+# Approximate: Sketches
+# -------------------------------
+
+class CountMinSketch:
+    def __init__(self, epsilon=CMS_EPSILON, delta=CMS_DELTA):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.uint32)
+        self.seeds = _mix64(np.arange(1, self.depth + 1, dtype=np.uint64))
+        self.total = 0
+
+    def _columns(self, hashes):
+        return (_mix64(hashes[None, :] ^ self.seeds[:, None]) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, hashes, counts):
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], counts)
+        self.total += int(counts.sum())
+
+    def estimate(self, hashes):
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, hashes):
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # bit length of `rest`, exact via its two 32-bit halves
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bits = np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+        rank = (64 - self.p) - bits + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    """Top-k candidates by Count-Min estimate, kept as {hash: ip}."""
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.candidates = {}
+
+    def update(self, sketch, hashes, ips):
+        pool = dict(self.candidates)
+        pool.update(zip(hashes.tolist(), ips))
+        keys = np.fromiter(pool, dtype=np.uint64, count=len(pool))
+        estimates = sketch.estimate(keys)
+        if len(keys) > self.k:
+            keep = np.argpartition(-estimates.astype(np.int64), self.k - 1)[:self.k]
+            keys = keys[keep]
+        self.candidates = {key: pool[key] for key in keys.tolist()}
+
+    def top(self, sketch):
+        keys = np.fromiter(self.candidates, dtype=np.uint64, count=len(self.candidates))
+        estimates = sketch.estimate(keys)
+        order = np.argsort(-estimates.astype(np.int64), kind="stable")
+        return [(self.candidates[int(keys[i])], int(estimates[i])) for i in order]
+
+
+class ApproxState:
+    """Fixed-size replacement for event_counts / failed_logins / suspicious_ips."""
+
+    def __init__(self, threshold, k=TOP_K, epsilon=CMS_EPSILON, delta=CMS_DELTA, precision=HLL_PRECISION):
+        self.threshold = threshold
+        self.events = CountMinSketch(epsilon, delta)
+        self.failures = CountMinSketch(epsilon, delta)
+        self.sources = HyperLogLog(precision)
+        self.top_events = HeavyHitters(k)
+        self.top_failures = HeavyHitters(k)
+
+    def add(self, event_batch, failed_batch):
+        for batch, sketch, hitters, distinct in ((event_batch, self.events, self.top_events, True),
+                                                 (failed_batch, self.failures, self.top_failures, False)):
+            if not batch:
+                continue
+            ips = list(batch)
+            hashes = hash_ips(ips)
+            sketch.add(hashes, np.fromiter(batch.values(), dtype=np.uint32, count=len(batch)))
+            hitters.update(sketch, hashes, ips)
+            if distinct:
+                self.sources.add(hashes)
+
+    def suspicious(self):
+        """Tracked IPs whose estimated failures reach the threshold (estimates only err upwards)."""
+        return [(ip, count) for ip, count in self.top_failures.top(self.failures) if count >= self.threshold]
+
+    def nbytes(self):
+        return self.events.table.nbytes + self.failures.table.nbytes + self.sources.registers.nbytes
+
+
+# -------------------------------
+# Batched Analysis
+# -------------------------------
+
+def iter_batches(records, batch_lines=BATCH_LINES):
+    """
+    ({ip: events}, {ip: failed logins}) per batch of parsed lines, from
+    (timestamp, ip, event) records such as log_inputs.iter_inputs yields.
+    """
+    records = iter(records)
+    while True:
+        events, failed = {}, {}
+        lines = 0
+        for timestamp, ip, event in records:
+            lines += 1
+
+            if ip:
+                events[ip] = events.get(ip, 0) + 1
+                if event == "FAILED_LOGIN":
+                    failed[ip] = failed.get(ip, 0) + 1
+
+            if lines >= batch_lines:
+                break
+        if not lines:
+            return
+        yield events, failed
+
+
+def analyze_compact(records, event_counts, failed_logins, suspicious_ips, threshold):
+    for events, failed in iter_batches(records):
+        event_counts.add(events)
+        failed_logins.add(failed)
+    suspicious_ips.update(failed_logins.at_least(threshold))
+
+
+def analyze_approx(records, state):
+    for events, failed in iter_batches(records):
+        state.add(events, failed)
+    return state
+
+
+# -------------------------------
+# Memory Benchmark
+# -------------------------------
+
+def _measure(build):
+    tracemalloc.start()
+    state = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return state, current
+
+
+def benchmark(distinct=1_000_000, seed=7):
+    """Memory held by each backend for `distinct` IPv4 sources with random counts."""
+    rng = np.random.default_rng(seed)
+    keys = rng.choice(2 ** 32, size=distinct, replace=False)
+    counts = rng.zipf(1.5, size=distinct).clip(max=2 ** 31)
+    ips = [int_to_ipv4(key) for key in keys]
+    batch = dict(zip(ips, counts.tolist()))
+
+    def build_dict():
+        # the dict owns its key strings, as it does when filled from a log
+        state = defaultdict(int)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            state[int_to_ipv4(key)] += count
+        return state
+
+    def build_compact():
+        state = CompactCounter()
+        state.add(batch)
+        return state
+
+    def build_approx():
+        state = ApproxState(threshold=5)
+        state.add(batch, {})
+        return state
+
+    print(f"=== STATE MEMORY, {distinct:,} distinct IPs, one counter (approx holds both sketches) ===")
+    exact, dict_bytes = _measure(build_dict)
+    compact, compact_bytes = _measure(build_compact)
+    approx, approx_bytes = _measure(build_approx)
+    for name, size in (("dict", dict_bytes), ("compact", compact_bytes), ("approx", approx_bytes)):
+        print(f"  {name:<8} {size / 2 ** 20:10.1f} MB  {size / distinct:8.1f} B/IP")
+
+    assert all(compact[ip] == exact[ip] for ip in ips[:10_000])
+    sample = np.array(ips[:10_000], dtype=object)
+    truth = counts[:10_000]
+    estimated = approx.events.estimate(hash_ips(list(sample))).astype(np.int64)
+    bound = CMS_EPSILON * approx.events.total
+    print(f"  Count-Min: max overestimate {int((estimated - truth).max())} (bound {bound:.0f} w.p. {1 - CMS_DELTA})")
+    print(f"  HyperLogLog: {approx.sources.count():,} distinct "
+          f"({(approx.sources.count() - distinct) / distinct:+.2%}, "
+          f"std error {1.04 / math.sqrt(approx.sources.m):.2%})")
+    top = sorted(batch.items(), key=lambda item: -item[1])[:10]
+    found = dict(approx.top_events.top(approx.events))
+    print(f"  Heavy hitters: {sum(ip in found for ip, _ in top)}/10 true top-10 listed")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
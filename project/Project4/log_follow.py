@@ -0,0 +1,186 @@
+# ================================
+# Follow Mode
+# Tails a log like `tail -F`: keeps reading as lines are appended,
+# reopens the file after rotation (new inode) or truncation, updates
+# per-IP counters as lines arrive and checkpoints where it got to.
+# ================================
+
+import json
+import os
+import time
+
+from log_anlyzer import parse_log_line
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+POLL_INTERVAL = 0.02        # seconds to sleep when there is nothing new
+READ_SIZE = 1024 * 1024     # bytes per read
+CHECKPOINT_INTERVAL = 5.0   # seconds between checkpoint writes
+
+# -------------------------------
+# Checkpoint
+# -------------------------------
+
+def save_checkpoint(path, state):
+    """Written to a temp file and renamed, so a crash never leaves half a checkpoint."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+# -------------------------------
+# Follower
+# -------------------------------
+
+class LogFollower:
+    """
+    Incremental analysis of a growing log file. Counters are the caller's
+    dicts (the module-level ones in log_anlyzer), so generate_report works
+    the same after following as after a batch run.
+
+    On restart the checkpoint restores the counters and, if the file still
+    has the same inode and is at least as long, the byte offset. If the log
+    was rotated while the follower was down, reading starts at the top of
+    the new file; lines written to the old one after the checkpoint are
+    not recovered. A window detector's buffers are not checkpointed; after
+    a restart windows fill up again from the new lines.
+    """
+
+    def __init__(self, path, event_counts, failed_logins, suspicious_ips, threshold,
+                 checkpoint_path=None, on_alert=None, detector=None):
+        self.path = path
+        self.event_counts = event_counts
+        self.failed_logins = failed_logins
+        self.suspicious_ips = suspicious_ips
+        self.threshold = threshold
+        self.checkpoint_path = checkpoint_path
+        self.on_alert = on_alert or (lambda ip, timestamp, count: None)
+        self.detector = detector
+        self.file = None
+        self.inode = None
+        self.offset = 0          # end of the last complete line processed
+        self.partial = b""
+        self.lines = 0
+        self.last_checkpoint = time.monotonic()
+
+    # ----- state -----
+
+    def restore(self):
+        state = load_checkpoint(self.checkpoint_path) if self.checkpoint_path else None
+        if not state or state.get("path") != os.path.abspath(self.path):
+            return False
+        self.event_counts.update(state["event_counts"])
+        self.failed_logins.update(state["failed_logins"])
+        self.suspicious_ips.update(state["suspicious_ips"])
+        self.inode = state["inode"]
+        self.offset = state["offset"]
+        return True
+
+    def checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        save_checkpoint(self.checkpoint_path, {
+            "path": os.path.abspath(self.path),
+            "inode": self.inode,
+            "offset": self.offset,
+            "event_counts": self.event_counts,
+            "failed_logins": self.failed_logins,
+            "suspicious_ips": sorted(self.suspicious_ips),
+        })
+        self.last_checkpoint = time.monotonic()
+
+    # ----- file handling -----
+
+    def _open(self):
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(self.file.fileno())
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode, self.offset = stat.st_ino, 0
+        self.file.seek(self.offset)
+        self.partial = b""
+        return True
+
+    def _rotated_or_truncated(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False  # mid-rotation: keep the old file until a new one appears
+        if stat.st_ino != self.inode:
+            return True
+        if stat.st_size < self.offset + len(self.partial):
+            self.inode = None  # truncated in place: same inode, start again from 0
+            return True
+        return False
+
+    # ----- processing -----
+
+    def _process(self, data):
+        data = self.partial + data
+        end = data.rfind(b"\n") + 1
+        self.partial = data[end:]
+        if not end:
+            return
+        self.offset += end
+
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            timestamp, ip, event = parse_log_line(line)
+            self.lines += 1
+
+            if not ip:
+                continue
+
+            self.event_counts[ip] = self.event_counts.get(ip, 0) + 1
+
+            if event == "FAILED_LOGIN":
+                self.failed_logins[ip] = self.failed_logins.get(ip, 0) + 1
+                if self.detector is not None:
+                    failures = self.detector.failure(ip, timestamp)
+                else:
+                    failures = self.failed_logins[ip]
+
+                if failures >= self.threshold and ip not in self.suspicious_ips:
+                    self.suspicious_ips.add(ip)
+                    self.on_alert(ip, timestamp, failures)
+
+    def poll(self):
+        """Reads whatever is new; returns the number of bytes read."""
+        if self.file is None and not self._open():
+            return 0
+        data = self.file.read(READ_SIZE)
+        if data:
+            self._process(data)
+        elif self._rotated_or_truncated():
+            self.file.close()
+            self.file = None
+            if self.partial and self.inode is not None:
+                self._process(b"\n")  # last line of the rotated file had no newline
+        if time.monotonic() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+            self.checkpoint()
+        return len(data)
+
+    def run(self, stop=None):
+        """Follows until interrupted (or until stop() returns True); always checkpoints on the way out."""
+        try:
+            while not (stop and stop()):
+                if not self.poll():
+                    time.sleep(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.checkpoint()
+            if self.file:
+                self.file.close()
@@ -0,0 +1,137 @@
+# ================================
+# Log Corpus Generator
+# Writes synthetic logs in the analyzer's [YYYY-MM-DD HH:MM:SS] IP EVENT
+# format for benchmarks and demos (sample_logs.txt included):
+#   - background traffic from `ips` sources with Zipf-like popularity
+#   - `attackers` extra sources, each sending bursts of FAILED_LOGIN lines
+#     a few seconds apart, sometimes ending in a LOGIN_SUCCESS
+#   - a share of malformed lines the parser has to skip
+# Output is reproducible for a given seed.
+# ================================
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from log_compact import ints_to_ipv4
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+CHUNK_LINES = 1_000_000
+EVENTS = ["LOGIN_SUCCESS", "FAILED_LOGIN", "LOGOUT", "FILE_ACCESS", "PASSWORD_CHANGE"]
+EVENT_WEIGHTS = [0.40, 0.08, 0.30, 0.20, 0.02]
+ZIPF_EXPONENT = 1.1
+MALFORMED = [
+    "garbage line",
+    "[{ts}] {ip}",                      # event missing
+    "[{ts}] {ip} FAILED_LOGIN extra",   # one field too many
+    "{ts} {ip} LOGIN_SUCCESS",          # no brackets
+    "[{ts}",                            # truncated
+    "[not-a-time] {ip} FAILED_LOGIN",   # bad timestamp
+    "",
+]
+
+# -------------------------------
+# Generator
+# -------------------------------
+
+def _random_ips(rng, count, exclude=()):
+    """`count` distinct dotted IPv4 addresses in 1.0.0.0-223.255.255.255."""
+    chosen = set(exclude)
+    keys = []
+    while len(keys) < count:
+        for key in rng.integers(1 << 24, 224 << 24, size=count - len(keys)).tolist():
+            if key not in chosen:
+                chosen.add(key)
+                keys.append(key)
+    return np.array(keys, dtype=np.uint32)
+
+
+def generate(path, lines=1_000_000, ips=10_000, attackers=20, burst=30, malformed=0.001,
+             rate=200, start="2025-01-01 00:00:00", seed=1):
+    """
+    Writes `lines` lines to path at `rate` lines per second of log time.
+    Returns the attacker IPs, each of which has at least `burst` failed
+    logins and so must be reported as suspicious.
+    """
+    rng = np.random.default_rng(seed)
+    background = _random_ips(rng, ips)
+    planted = _random_ips(rng, attackers, exclude=background.tolist())
+    names = np.array(ints_to_ipv4(np.concatenate([background, planted])), dtype=object)
+    popularity = 1.0 / np.arange(1, ips + 1) ** ZIPF_EXPONENT
+    popularity /= popularity.sum()
+
+    # Every attacker gets one to three bursts, spliced into the background
+    # traffic at random points
+    owners = rng.permutation(np.repeat(np.arange(attackers), rng.integers(1, 4, size=attackers)))
+    bursts = [[EVENTS.index("FAILED_LOGIN")] * burst + ([EVENTS.index("LOGIN_SUCCESS")] if rng.random() < 0.2 else [])
+              for _ in owners]
+    attack_lines = sum(map(len, bursts))
+    if attack_lines > lines:
+        raise ValueError(f"{attack_lines} attack lines do not fit in {lines} lines")
+
+    quiet = lines - attack_lines
+    splits = np.sort(rng.integers(0, quiet + 1, size=len(owners)))
+    ip_parts = np.split(rng.choice(ips, size=quiet, p=popularity), splits)
+    event_parts = np.split(rng.choice(len(EVENTS), size=quiet, p=EVENT_WEIGHTS), splits)
+    ip_index, event_index, attack = [ip_parts[0]], [event_parts[0]], [np.zeros(len(ip_parts[0]), dtype=bool)]
+    for owner, events, ip_part, event_part in zip(owners, bursts, ip_parts[1:], event_parts[1:]):
+        ip_index += [np.full(len(events), ips + owner), ip_part]
+        event_index += [np.array(events), event_part]
+        attack += [np.ones(len(events), dtype=bool), np.zeros(len(ip_part), dtype=bool)]
+    ip_index, event_index = np.concatenate(ip_index), np.concatenate(event_index)
+
+    # planted lines stay intact so every attacker keeps its full bursts
+    broken = (rng.random(lines) < malformed) & ~np.concatenate(attack)
+    seconds = int(datetime.fromisoformat(start).timestamp()) + np.arange(lines) // rate
+    stamps = {}
+    event_names = np.array(EVENTS, dtype=object)
+
+    with open(path, "w") as f:
+        for begin in range(0, lines, CHUNK_LINES):
+            stop = min(begin + CHUNK_LINES, lines)
+            chunk = []
+            for second, ip, event, bad in zip(seconds[begin:stop].tolist(), names[ip_index[begin:stop]],
+                                              event_names[event_index[begin:stop]], broken[begin:stop]):
+                stamp = stamps.get(second)
+                if stamp is None:
+                    stamps.clear()
+                    stamp = stamps[second] = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+                if bad:
+                    chunk.append(MALFORMED[len(chunk) % len(MALFORMED)].format(ts=stamp, ip=ip) + "\n")
+                else:
+                    chunk.append(f"[{stamp}] {ip} {event}\n")
+            f.writelines(chunk)
+
+    return sorted(names[ips:].tolist())
+
+
+# -------------------------------
+# Entry Point
+# -------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic security log for log_anlyzer.py.")
+    parser.add_argument("path", nargs="?", default="sample_logs.txt")
+    parser.add_argument("-n", "--lines", type=int, default=1_000_000)
+    parser.add_argument("--ips", type=int, default=10_000, help="distinct background sources")
+    parser.add_argument("--attackers", type=int, default=20, help="planted brute-force sources")
+    parser.add_argument("--burst", type=int, default=30, help="failed logins per burst")
+    parser.add_argument("--malformed", type=float, default=0.001, help="share of malformed lines")
+    parser.add_argument("--rate", type=int, default=200, help="lines per second of log time")
+    parser.add_argument("--start", default="2025-01-01 00:00:00")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    began = time.perf_counter()
+    planted = generate(args.path, args.lines, args.ips, args.attackers, args.burst, args.malformed,
+                       args.rate, args.start, args.seed)
+    print(f"Wrote {args.lines:,} lines to {args.path} in {time.perf_counter() - began:.1f}s")
+    print(f"Planted attackers: {', '.join(planted[:10])}{' ...' if len(planted) > 10 else ''}")
@@ -0,0 +1,198 @@
+# ================================
+# Log Inputs
+# Globs of (rotated) log files, plain or .gz/.zst compressed, in the
+# analyzer's own format, syslog or sshd auth.log. Every parser yields
+# the same (timestamp, ip, event) tuples as parse_log_line, with
+# timestamps as "YYYY-MM-DD HH:MM:SS".
+# ================================
+
+import glob
+import gzip
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from log_anlyzer import parse_log_line
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+FORMATS = ["auto", "custom", "syslog", "auth"]
+DETECT_LINES = 200
+
+MONTHS = {name: number for number, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+
+# "Jan  5 12:45:23 host prog[pid]: message" or the ISO form rsyslog writes by default on newer systems
+SYSLOG_LINE = re.compile(
+    r"^(?:(?P<month>[A-Z][a-z]{2}) +(?P<day>\d{1,2}) (?P<time>\d\d:\d\d:\d\d)"
+    r"|(?P<iso>\d{4}-\d\d-\d\d)T(?P<iso_time>\d\d:\d\d:\d\d)\S*)"
+    r" \S+ (?P<program>[^\s\[:]+)(?:\[\d+\])?: (?P<message>.*)$"
+)
+
+ADDRESS = r"(?P<ip>[0-9A-Fa-f.:]+)"
+SSHD_RULES = [
+    (re.compile(r"^Failed \S+ for (?:invalid user )?.*? from " + ADDRESS + r" port"), "FAILED_LOGIN"),
+    (re.compile(r"^Accepted \S+ for .*? from " + ADDRESS + r" port"), "LOGIN_SUCCESS"),
+    (re.compile(r"^Invalid user .*? from " + ADDRESS), "INVALID_USER"),
+    (re.compile(r"^Connection closed by (?:authenticating user \S+ |invalid user \S+ )?" + ADDRESS + r" port"),
+     "CONNECTION_CLOSED"),
+    (re.compile(r"^Disconnected from (?:authenticating user \S+ |invalid user \S+ |user \S+ )?" + ADDRESS + r" port"),
+     "DISCONNECTED"),
+    (re.compile(r"^error: maximum authentication attempts exceeded for .*? from " + ADDRESS), "MAX_AUTH_ATTEMPTS"),
+]
+PAM_FAILURE = re.compile(r"authentication failure;.*\brhost=" + ADDRESS)
+ANY_IPV4 = re.compile(r"\b(?P<ip>(?:\d{1,3}\.){3}\d{1,3})\b")
+
+# -------------------------------
+# Opening Files
+# -------------------------------
+
+def expand_inputs(patterns):
+    """Globs in order of modification time (oldest rotated file first); unmatched names are kept as given."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern), key=lambda path: (os.path.getmtime(path), path))
+        paths.extend(matches or [pattern])
+    return list(dict.fromkeys(paths))
+
+
+def open_log(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit(f"Reading {path} needs zstandard: pip install zstandard")
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def is_plain(path):
+    return not path.endswith((".gz", ".zst"))
+
+
+# -------------------------------
+# Parsers
+# -------------------------------
+
+class SyslogParser:
+    """
+    Syslog framing plus message rules. sshd messages are classified by
+    SSHD_RULES; in "syslog" mode PAM authentication failures from other
+    programs count as FAILED_LOGIN and any other line mentioning an IPv4
+    address is counted under its program name. "auth" mode keeps sshd
+    only.
+
+    Classic syslog timestamps have no year: it is taken from the file's
+    modification time, minus one for months after that (a log that spans
+    New Year).
+    """
+
+    def __init__(self, sshd_only=False, mtime=None):
+        self.sshd_only = sshd_only
+        stamp = datetime.fromtimestamp(mtime) if mtime else datetime.now()
+        self.year, self.month = stamp.year, stamp.month
+
+    def timestamp(self, match):
+        if match["iso"]:
+            return f"{match['iso']} {match['iso_time']}"
+        month = MONTHS.get(match["month"], 1)
+        year = self.year - 1 if month > self.month else self.year
+        return f"{year}-{month:02d}-{int(match['day']):02d} {match['time']}"
+
+    def __call__(self, line):
+        match = SYSLOG_LINE.match(line.rstrip("\r\n"))
+        if not match:
+            return None, None, None
+        program, message = match["program"], match["message"]
+
+        if program == "sshd":
+            for rule, event in SSHD_RULES:
+                found = rule.match(message)
+                if found:
+                    return self.timestamp(match), found["ip"], event
+            return None, None, None
+        if self.sshd_only:
+            return None, None, None
+
+        found = PAM_FAILURE.search(message)
+        if found:
+            return self.timestamp(match), found["ip"], "FAILED_LOGIN"
+        found = ANY_IPV4.search(message)
+        if found:
+            return self.timestamp(match), found["ip"], program.upper()
+        return None, None, None
+
+
+def detect_format(path):
+    """Format of the file judged from its first DETECT_LINES lines."""
+    with open_log(path) as file:
+        sample = [line for line in islice(file, DETECT_LINES) if line.strip()]
+    if not sample:
+        return "custom"
+    custom = sum(1 for line in sample if parse_log_line(line)[1])
+    framed = [SYSLOG_LINE.match(line.rstrip("\r\n")) for line in sample]
+    framed = [match for match in framed if match]
+    if custom >= len(framed):
+        return "custom"
+    sshd = sum(1 for match in framed if match["program"] == "sshd")
+    return "auth" if sshd * 2 >= len(framed) else "syslog"
+
+
+def get_parser(path, fmt="auto"):
+    if fmt == "auto":
+        fmt = detect_format(path)
+    if fmt == "custom":
+        return fmt, parse_log_line
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return fmt, SyslogParser(sshd_only=fmt == "auth", mtime=mtime)
+
+
+def iter_records(path, fmt="auto"):
+    """(timestamp, ip, event) for every line of one file; unparsed lines give (None, None, None)."""
+    fmt, parse = get_parser(path, fmt)
+    with open_log(path) as file:
+        for line in file:
+            yield parse(line)
+
+
+def iter_inputs(paths, fmt="auto"):
+    for path in paths:
+        yield from iter_records(path, fmt)
+
+
+# -------------------------------
+# Concurrent Processing
+# -------------------------------
+
+def count_file(path, fmt="auto"):
+    """Worker: local (event_counts, failed_logins) for one file, in first-seen order."""
+    event_counts = {}
+    failed_logins = {}
+
+    for timestamp, ip, event in iter_records(path, fmt):
+        if not ip:
+            continue
+
+        event_counts[ip] = event_counts.get(ip, 0) + 1
+
+        if event == "FAILED_LOGIN":
+            failed_logins[ip] = failed_logins.get(ip, 0) + 1
+
+    return event_counts, failed_logins
+
+
+def analyze_files(paths, fmt, workers, event_counts, failed_logins, suspicious_ips, threshold):
+    """One file per worker process (decompression included), merged in input order."""
+    from log_parallel import merge_counts
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(count_file, paths, [fmt] * len(paths)))
+    merge_counts(results, event_counts, failed_logins, suspicious_ips, threshold)
@@ -0,0 +1,109 @@
+# ================================
+# Parallel Log Parsing
+# Splits a log file into newline-aligned byte ranges, parses each range
+# in a worker process from a memory map and merges the per-range counters.
+# ================================
+
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from log_anlyzer import parse_log_line
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+BLOCK_SIZE = 64 * 1024 * 1024    # bytes decoded at a time inside a worker
+MIN_RANGE_SIZE = 1024 * 1024     # smaller files are not worth splitting further
+
+# -------------------------------
+# Range Splitting
+# -------------------------------
+
+def _next_line_start(mm, pos, end):
+    """First byte after the newline at or after pos (or end)."""
+    if pos <= 0:
+        return 0
+    newline = mm.find(b"\n", pos - 1, end)
+    return end if newline == -1 else newline + 1
+
+
+def split_ranges(path, parts):
+    """
+    (start, end) byte ranges covering the file, each starting at the
+    beginning of a line, so no line is split between two workers.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    parts = max(1, min(parts, size // MIN_RANGE_SIZE or 1))
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [_next_line_start(mm, size * i // parts, size) for i in range(parts)] + [size]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+# -------------------------------
+# Worker
+# -------------------------------
+
+def count_range(path, start, end):
+    """
+    Parses lines in [start, end) with parse_log_line and returns local
+    (event_counts, failed_logins) dicts in first-seen order.
+    """
+    event_counts = {}
+    failed_logins = {}
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            block_end = _next_line_start(mm, min(pos + BLOCK_SIZE, end), end)
+            text = mm[pos:block_end].decode("utf-8", errors="replace")
+            pos = block_end
+
+            # same line breaks as iterating a text-mode file (universal newlines)
+            for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+                timestamp, ip, event = parse_log_line(line)
+
+                if not ip:
+                    continue
+
+                event_counts[ip] = event_counts.get(ip, 0) + 1
+
+                if event == "FAILED_LOGIN":
+                    failed_logins[ip] = failed_logins.get(ip, 0) + 1
+
+    return event_counts, failed_logins
+
+
+# -------------------------------
+# Merge
+# -------------------------------
+
+def merge_counts(results, event_counts, failed_logins, suspicious_ips, threshold):
+    """
+    Adds range results, in file order, into the caller's counters. Merging
+    in order keeps first-seen IP order the same as a sequential pass, and
+    since counts only grow, "crossed the threshold at some point" is the
+    same as "final count >= threshold".
+    """
+    for local_events, local_failed in results:
+        for ip, count in local_events.items():
+            event_counts[ip] += count
+        for ip, count in local_failed.items():
+            failed_logins[ip] += count
+
+    for ip, count in failed_logins.items():
+        if count >= threshold:
+            suspicious_ips.add(ip)
+
+
+def analyze_parallel(path, workers, event_counts, failed_logins, suspicious_ips, threshold):
+    ranges = split_ranges(path, workers)
+    if len(ranges) <= 1:
+        results = [count_range(path, *r) for r in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(count_range, [path] * len(ranges), *zip(*ranges)))
+    merge_counts(results, event_counts, failed_logins, suspicious_ips, threshold)
@@ -0,0 +1,175 @@
+# ================================
+# Report Output
+# Ranked terminal summary and a full per-IP table written as CSV, JSON
+# lines or Parquet. Only the top-k rows are ever sorted (heap selection,
+# or one numpy partition for the compact backend); the table is streamed in
+# chunks in the counters' own order.
+# ================================
+
+import csv
+import heapq
+import json
+from itertools import islice
+
+from log_anlyzer import FAILED_LOGIN_THRESHOLD, MEDIUM_RISK_FAILURES
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+TABLE_CHUNK = 100_000
+TABLE_COLUMNS = ["ip", "events", "failed_logins", "risk"]
+
+# -------------------------------
+# Rows
+# -------------------------------
+
+def risk_level(failures):
+    if failures >= FAILED_LOGIN_THRESHOLD:
+        return "HIGH"
+    elif failures >= MEDIUM_RISK_FAILURES:
+        return "MEDIUM"
+    else:
+        return "LOW"
+
+
+def _is_compact(counter):
+    return hasattr(counter, "aligned")
+
+
+def iter_chunks(event_counts, failed_logins, risk_failures=None, size=TABLE_CHUNK):
+    """
+    Lists of (ip, events, failed_logins, risk) rows. Risk comes from
+    failed_logins, or from risk_failures (e.g. a window detector's peaks)
+    when given; compact counters are always rated on failed_logins.
+    """
+    if _is_compact(event_counts):
+        yield from _compact_chunks(event_counts, failed_logins, risk_failures, size)
+        return
+
+    get_failed = failed_logins.get
+    get_risk = risk_failures.get if risk_failures is not None else get_failed
+    items = iter(event_counts.items())
+    while True:
+        chunk = [(ip, events, get_failed(ip, 0), risk_level(get_risk(ip, 0)))
+                 for ip, events in islice(items, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _compact_chunks(event_counts, failed_logins, risk_failures, size):
+    import numpy as np
+    from log_compact import ints_to_ipv4
+
+    failed = event_counts.aligned(failed_logins)
+    risk = np.full(len(failed), "LOW", dtype=object)
+    risk[failed >= MEDIUM_RISK_FAILURES] = "MEDIUM"
+    risk[failed >= FAILED_LOGIN_THRESHOLD] = "HIGH"
+
+    keys, events = event_counts.keys, event_counts.counts
+    for start in range(0, len(keys), size):
+        stop = start + size
+        yield list(zip(ints_to_ipv4(keys[start:stop]), events[start:stop].tolist(),
+                       failed[start:stop].tolist(), risk[start:stop].tolist()))
+    others = [(ip, count, failed_logins.other.get(ip, 0), risk_level(failed_logins.other.get(ip, 0)))
+              for ip, count in event_counts.other.items()]
+    if others:
+        yield others
+
+
+# -------------------------------
+# Top-k Selection
+# -------------------------------
+
+def top_ips(event_counts, failed_logins, k, by="failures"):
+    """
+    k rows of (ip, events, failed_logins), highest first, ranked by failed
+    logins then events (or the other way round with by="events"). Ties
+    keep the counters' order. O(n log k) with a heap; the compact backend
+    selects in O(n) with one partition over a packed 64-bit key.
+    """
+    key = (lambda row: (row[2], row[1])) if by == "failures" else (lambda row: (row[1], row[2]))
+    if k <= 0:
+        return []
+
+    if _is_compact(event_counts):
+        import numpy as np
+        from log_compact import int_to_ipv4
+
+        failed = event_counts.aligned(failed_logins)
+        events = event_counts.counts
+        primary, secondary = (failed, events) if by == "failures" else (events, failed)
+        packed = (primary.astype(np.uint64) << np.uint64(32)) | secondary
+        if len(packed) > k:
+            cut = np.partition(packed, len(packed) - k)[len(packed) - k]
+            above = np.flatnonzero(packed > cut)
+            level = np.flatnonzero(packed == cut)[:k - len(above)]
+            picked = np.concatenate([above, level])
+        else:
+            picked = np.arange(len(packed))
+        picked = np.sort(picked)
+        picked = picked[np.argsort(~packed[picked], kind="stable")]
+        rows = [(int_to_ipv4(ip), count, failures) for ip, count, failures in
+                zip(event_counts.keys[picked].tolist(), events[picked].tolist(), failed[picked].tolist())]
+        others = ((ip, count, failed_logins.other.get(ip, 0)) for ip, count in event_counts.other.items())
+        return heapq.nlargest(k, [*rows, *others], key=key)
+
+    get_failed = failed_logins.get
+    rows = ((ip, events, get_failed(ip, 0)) for ip, events in event_counts.items())
+    return heapq.nlargest(k, rows, key=key)
+
+
+def totals(counter):
+    if _is_compact(counter):
+        return int(counter.counts.sum(dtype="uint64")) + sum(counter.other.values())
+    return sum(counter.values())
+
+
+def top_suspicious(suspicious_ips, failed_logins, k):
+    """k (ip, failed_logins) pairs, most failures first; ties by IP so set order never shows."""
+    return heapq.nsmallest(k, ((ip, failed_logins[ip]) for ip in suspicious_ips),
+                           key=lambda row: (-row[1], row[0]))
+
+
+# -------------------------------
+# Table Writers
+# -------------------------------
+
+def write_table(path, event_counts, failed_logins, risk_failures=None):
+    """Full per-IP table; the format follows the extension (.csv, .jsonl, .parquet). Returns rows written."""
+    chunks = iter_chunks(event_counts, failed_logins, risk_failures)
+    rows = 0
+
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        schema = pa.schema([("ip", pa.string()), ("events", pa.int64()),
+                            ("failed_logins", pa.int64()), ("risk", pa.dictionary(pa.int8(), pa.string()))])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                columns = list(zip(*chunk))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(columns[0]), pa.array(columns[1], pa.int64()), pa.array(columns[2], pa.int64()),
+                     pa.array(columns[3]).dictionary_encode().cast(schema.field("risk").type)],
+                    schema=schema))
+                rows += len(chunk)
+        return rows
+
+    with open(path, "w", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            dumps = json.dumps
+            for chunk in chunks:
+                f.writelines(f'{{"ip": {dumps(ip)}, "events": {events}, "failed_logins": {failed}, '
+                             f'"risk": "{risk}"}}\n' for ip, events, failed, risk in chunk)
+                rows += len(chunk)
+        else:
+            writer = csv.writer(f)
+            writer.writerow(TABLE_COLUMNS)
+            for chunk in chunks:
+                writer.writerows(chunk)
+                rows += len(chunk)
+    return rows
@@ -0,0 +1,95 @@
+# ================================
+# Sliding-Window Brute-Force Detection
+# Counts failed logins per IP inside a time window instead of over the
+# whole log, so a source that fails once a day never looks like a
+# brute-force attack.
+# ================================
+
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from log_anlyzer import FAILED_LOGIN_THRESHOLD, MEDIUM_RISK_FAILURES
+
+# -------------------------------
+# Configuration
+# -------------------------------
+
+WINDOW_SECONDS = 300
+
+EPOCH = datetime(1970, 1, 1)
+
+# -------------------------------
+# Helper Functions
+# -------------------------------
+
+_last_timestamp = (None, 0.0)
+
+
+def to_seconds(timestamp):
+    """'YYYY-MM-DD HH:MM:SS' -> seconds; consecutive lines mostly share a second, so the last one is cached."""
+    global _last_timestamp
+    if timestamp != _last_timestamp[0]:
+        _last_timestamp = (timestamp, (datetime.fromisoformat(timestamp) - EPOCH).total_seconds())
+    return _last_timestamp[1]
+
+
+# -------------------------------
+# Detector
+# -------------------------------
+
+class WindowDetector:
+    """
+    Per-IP ring buffer of the last `threshold` failure times. The number
+    of failures within `window` seconds is exact up to `threshold`, which
+    is all the risk levels need, and each IP costs at most `threshold`
+    floats however long the log is.
+
+    Buffers live in an OrderedDict kept in last-failure order, so IPs idle
+    for a whole window are expired from the front in O(1) each. Only IPs
+    that reached MEDIUM keep an entry (their peak count) after expiring.
+
+    Timestamps are expected in (roughly) increasing order, as logs are
+    written.
+    """
+
+    def __init__(self, window=WINDOW_SECONDS, threshold=FAILED_LOGIN_THRESHOLD, medium=MEDIUM_RISK_FAILURES):
+        self.window = window
+        self.threshold = threshold
+        self.medium = medium
+        self.buffers = OrderedDict()
+        self.peak = {}
+
+    def failure(self, ip, timestamp):
+        """Records a failed login; returns the IP's failures within the window ending now."""
+        now = to_seconds(timestamp)
+        buffer = self.buffers.get(ip)
+        if buffer is None:
+            buffer = self.buffers[ip] = deque(maxlen=self.threshold)
+        else:
+            self.buffers.move_to_end(ip)
+        buffer.append(now)
+
+        count = len(buffer)
+        oldest = now - self.window
+        for seen in buffer:
+            if seen >= oldest:
+                break
+            count -= 1
+
+        if count >= self.medium and count > self.peak.get(ip, 0):
+            self.peak[ip] = count
+        self.expire(now)
+        return count
+
+    def expire(self, now):
+        oldest = now - self.window
+        buffers = self.buffers
+        while buffers:
+            ip, buffer = next(iter(buffers.items()))
+            if buffer[-1] >= oldest:
+                break
+            del buffers[ip]
+
+    def peak_failures(self, ip):
+        """Most failures this IP had inside any one window (0 below MEDIUM)."""
+        return self.peak.get(ip, 0)
@@ -1,164 +1,174 @@
-from typing import final
+import argparse
+import glob
+import os
+import re
+import sys
 
 import pandas as pd
-import openpyxl
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from openpyxl import load_workbook
-
-lf = pd.read_excel("ALL_SERVICES_COMBINED.xlsx")
-
-Business22_23 = pd.read_excel(r"C:\Users\aaron\Blanche Code for Anaylsis Business\Business 22-23.xlsx")
-Business23_24 = pd.read_excel(r"C:\Users\aaron\Blanche Code for Anaylsis Business\Business 23-24.xlsx")
-Business24_25 = pd.read_excel(r"C:\Users\aaron\Blanche Code for Anaylsis Business\Business 24-25.xlsx")
-
-Business22_23["Year"] = 2023
-Business23_24["Year"] = 2024
-Business24_25["Year"] = 2025
-
-df = pd.concat([Business22_23,Business23_24, Business24_25], ignore_index=True)
-
-combined = pd.concat([Business22_23, Business23_24, Business24_25], ignore_index=True)
-final_data = combined[['Category', 'Service ID', 'Description', 'Total', "Year"]] \
-              .sort_values(['Category', 'Total'], ascending=[True, False])
-
-
-final_data.to_excel('ALL_SERVICES_COMBINED.xlsx', index=False)
-
-
-Final_dataFrame = pd.DataFrame(final_data)
-
-# (₹) the currency they use
-
-total_hair_revenue = lf[lf["Category"] == "Hair"]["Total"].sum()
-total_threading_revenue = lf[lf["Category"] == "Threading"]["Total"].sum()
-total_waxing_revenue = lf[lf["Category"] == "Waxing"]["Total"].sum()
-total_nails_revenue = lf[lf["Category"] == "Nails"]["Total"].sum()
-total_shampoo_revenue = lf[lf["Category"] == "Shampoo"]["Total"].sum()
-total_shave_revenue = lf[lf["Category"] == "Shave"]["Total"].sum()
-total_colour_revenue = lf[lf["Category"] == "Colour"]["Total"].sum()
-total_flavour_waxing_revenue = lf[lf["Category"] == "Flavoured_Waxing"]["Total"].sum()
-total_treatment_revenue = lf[lf["Category"] == "Treatment"]["Total"].sum()
-total_hair_styling_revenue = lf[lf["Category"] == "Hair_styling"]["Total"].sum()
-total_facials_revenue = lf[lf["Category"] == "Facials"]["Total"].sum()
-total_clean_up_revenue = lf[lf["Category"] == "Clean_Up"]["Total"].sum()
-total_bleach_revenue = lf[lf["Category"] == "Bleach"]["Total"].sum()
-total_de_tan_revenue = lf[lf["Category"] == "De-Tan"]["Total"].sum()
-total_hair_spa_revenue = lf[lf["Category"] == "Hair_spa"]["Total"].sum()
-total_straightening_revenue = lf[lf["Category"] == "Straightening"]["Total"].sum()
-total_advance_facials_revenue = lf[lf["Category"] == "Advanced_Facials"]["Total"].sum()
-total_keratin_revenue = lf[lf["Category"] == "Keratin"]["Total"].sum()
-total_product_revenue = lf[lf["Category"] == "PRODUCT"]["Total"].sum()
-total_highlights_revenue = lf[lf["Category"] == "HighLights"]["Total"].sum()
-total_trimming_revenue = lf[lf["Category"] == "Trimming"]["Total"].sum()
-total_makeup_revenue = lf[lf["Category"] == "Makeup"]["Total"].sum()
-total_bridal_revenue = lf[lf["Category"] == "Bridal"]["Total"].sum()
-total_ear_piercing_revenue = lf[lf["Category"] == "Ear_Piercing"]["Total"].sum()
-total_service_revenue = lf[lf["Category"] == "SERVICES"]["Total"].sum()
-total_spa_services_revenue = lf[lf["Category"] == "Spa_Services"]["Total"].sum()
-total_power_mask_revenue = lf[lf["Category"] == "Power_Mask"]["Total"].sum()
-
-
-
-
-
-print("The max is ₹",final_data["Total"].max())
-print("The min is ₹",final_data["Total"].min())
-
-wb = load_workbook("ALL_SERVICES_COMBINED.xlsx")
-ws = wb.active
-
-max_value = f"₹{final_data["Total"].max():,}"
-min_value =f"₹{final_data["Total"].min():,}"
-
-max_value_index = final_data.loc[final_data["Total"].idxmax()]
-min_value_index = final_data.loc[final_data["Total"].idxmin()]
-
-
-
-ws.cell(row=1, column=6).value="MAX"
-ws.cell(row=1,column=8).value="MIN"
-
-ws.cell(row=2, column=6).value= max_value
-ws.cell(row=2, column=8).value= min_value
-
-wb.save("ALL_SERVICES_COMBINED.xlsx")
-
-
-
-#where the results will go
-results = []
-
-
-# loop through all the services provided
-services = lf["Category"].unique()
-print(services)
-
-num_service = lf["Category"].value_counts()
-print(num_service)
-
-#for category in categories:
- #   category_lf = lf[lf["Category"] == category].sort_values("Year")
-
-
-
-
-perdict_year = input("Please type in the year you want perdicted:")
-
-print(perdict_year)
-
-user_perdicted_year = perdict_year
-
-for category in services:
-    category_lf = lf[lf["Category"] == category].sort_values("Year")
-
-# x will be category
-# y will be sales
-    x = category_lf[["Year"]]
-    y = category_lf["Total"]
-
-#skip if not enough data to perdict
-    if len(x) < 2:
-        continue
-
-    model = LinearRegression()
-    model.fit(x,y)
-
-    predicted_revenue = model.predict([int[user_perdicted_year]])[0]
-
-    #store results
-    results.append({
+from excel_export import write_combined_workbook
+
+# the business files we get are named after the financial year, e.g. "Business 22-23.xlsx"
+DEFAULT_INPUTS = ["Business *.xlsx"]
+COMBINED_FILE = "ALL_SERVICES_COMBINED.xlsx"
+
+
+def year_from_filename(path):
+    # "22-23" -> 2023, the year the financial year closes in
+    match = re.search(r"(\d{2})-(\d{2})", os.path.basename(path))
+    if match:
+        return 2000 + int(match.group(2))
+    match = re.search(r"(?:19|20)\d{2}", os.path.basename(path))
+    return int(match.group()) if match else None
+
+
+def load_business_files(patterns):
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        raise SystemExit(f"No input files matched: {', '.join(patterns)}")
+
+    frames = []
+    for path in paths:
+        if path.endswith(".csv"):
+            business = pd.read_csv(path)
+        else:
+            business = pd.read_excel(path)
+
+        # a numeric Year column wins, otherwise take it from the file name
+        if "Year" not in business.columns or pd.to_numeric(business["Year"], errors="coerce").isna().all():
+            year = year_from_filename(path)
+            if year is None:
+                raise SystemExit(f"Could not work out the year for {path}")
+            business["Year"] = year
+        print(f"Loaded {path}: {len(business)} rows")
+        frames.append(business)
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined["Year"] = pd.to_numeric(combined["Year"], errors="coerce")
+    combined["Total"] = pd.to_numeric(combined["Total"], errors="coerce")
+    combined = combined.dropna(subset=["Category", "Year", "Total"])
+
+    return combined[['Category', 'Service ID', 'Description', 'Total', "Year"]] \
+        .sort_values(['Category', 'Total'], ascending=[True, False])
+
+
+def parse_years(values):
+    # accepts "2026", "2026,2027" and "2026-2030", in any mix
+    years = []
+    for value in values:
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                start, end = map(int, part.split("-"))
+                years.extend(range(start, end + 1))
+            else:
+                years.append(int(part))
+    return sorted(set(years))
+
+
+def fit_category_trends(final_data):
+    """
+    Least-squares line of Total against Year for every category at once.
+    Same answer as fitting a LinearRegression per category, but done with
+    one groupby over the sums instead of a Python loop. Years and totals
+    are centered on their category means first: the textbook form
+    n*sum(x^2) - sum(x)^2 on raw years like 2024 subtracts two numbers
+    around 10^7 * n and loses most of its digits.
+    """
+    category = final_data["Category"]
+    x = final_data["Year"].astype(float)
+    y = final_data["Total"].astype(float)
+    groups = pd.DataFrame({"x": x, "y": y}).groupby(category)
+    means = groups.transform("mean")
+    dx = x - means["x"]
+    dy = y - means["y"]
+    sums = pd.DataFrame({
         "Category": category,
-        "Predicted_revenue": predicted_revenue
-    })
-
-results_lf = pd.DataFrame(results)
+        "n": 1.0,
+        "dxx": dx * dx,
+        "dxy": dx * dy,
+    }).groupby("Category").sum()
+    centers = groups.mean()
 
-results_lf = results_lf.sort_values("Predicted_revenue", ascending=False)
+    # skip if not enough data to perdict
+    sums = sums[sums["n"] >= 2]
+    centers = centers.loc[sums.index]
 
-print("Predicted Revenues for Year", [perdict_year])
-print(results_lf)
+    slope = np.where(sums["dxx"] > 0, sums["dxy"] / sums["dxx"].where(sums["dxx"] > 0, 1), 0.0)
+    intercept = centers["y"] - slope * centers["x"]
 
-best_category = results_lf.iloc[0]
+    return pd.DataFrame({"Slope": slope, "Intercept": intercept}, index=sums.index)
 
-print("\nThe service predicted to have the greatest revenue in", perdict_year, "is:", best_category["Category"])
 
+def forecast_matrix(trends, years):
+    # category x year, one broadcast instead of one predict() call per pair
+    years = np.asarray(years, dtype=float)
+    values = trends["Intercept"].to_numpy()[:, None] + trends["Slope"].to_numpy()[:, None] * years[None, :]
+    return pd.DataFrame(values, index=trends.index, columns=years.astype(int))
 
-#this is your model creating one
-model = LinearRegression()
 
+def write_forecast(forecast, output, output_format):
+    if output_format == "csv":
+        forecast.to_csv(output)
+    elif output_format == "json":
+        forecast.rename(columns=str).to_json(output, orient="index", indent=2)
+    else:
+        forecast.to_excel(output)
+    print(f"Forecast written to {output}")
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(description="Combine the business files and forecast revenue per category.")
+    parser.add_argument("-i", "--inputs", nargs="+", default=DEFAULT_INPUTS,
+                        help="input files or globs (default: %(default)s)")
+    parser.add_argument("-y", "--years", nargs="+",
+                        help="years to forecast, e.g. 2026 2027 or 2026-2030")
+    parser.add_argument("-o", "--output", help="where to write the category x year forecast")
+    parser.add_argument("-f", "--format", choices=["csv", "json", "xlsx"], default="csv")
+    parser.add_argument("--combined-output", default=COMBINED_FILE,
+                        help="combined workbook to write, empty to skip (default: %(default)s)")
+    return parser
 
 
+def main(argv=None):
+    args = build_parser().parse_args(argv)
 
+    if args.years:
+        years = parse_years(args.years)
+    elif sys.stdin.isatty():
+        years = parse_years([input("Please type in the year you want perdicted:")])
+    else:
+        raise SystemExit("--years is required when not running interactively")
 
+    final_data = load_business_files(args.inputs)
 
+    # (₹) the currency they use
+    print("The max is ₹", final_data["Total"].max())
+    print("The min is ₹", final_data["Total"].min())
 
+    # data, MAX/MIN cells and top categories written in one streaming pass
+    if args.combined_output:
+        write_combined_workbook(final_data, args.combined_output)
 
+    print(final_data["Category"].value_counts())
 
+    trends = fit_category_trends(final_data)
+    forecast = forecast_matrix(trends, years)
+    if forecast.empty:
+        print("No category has enough data to perdict")
+        return
 
+    print("Predicted Revenues for Years", years)
+    print(forecast.sort_values(years[-1], ascending=False))
 
+    for year in years:
+        print(f"The service predicted to have the greatest revenue in {year} is: {forecast[year].idxmax()}")
 
+    if args.output:
+        write_forecast(forecast, args.output, args.format)
 
 
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
-from flask import Flask , render_template_string , request , redirect
+from flask import Flask , render_template_string , request , redirect , Response
 import os
 import pandas as pd
-import re
 from sklearn.linear_model import LinearRegression
 import plotly.express as px
 import json
@@ -10,11 +9,22 @@ from werkzeug.utils import secure_filename
 import warnings
 import numpy as np
 import requests
+from model_store import SharedModelStore , dataset_key , default_store_dir , valid_key
+from excel_export import stream_workbook
+from uploads import SpoolingRequest , spooled_path
+from data_profiler import DataProfiler
+import time
 
 app = Flask (__name__)
+app.request_class = SpoolingRequest
 app.config[ 'UPLOAD_FOLDER' ] = 'uploads'
+app.config[ 'MAX_CONTENT_LENGTH' ] = int (os.environ.get ('MAX_CONTENT_LENGTH' , 1024 * 1024 * 1024))  # 1 GB
+app.config[ 'SPOOL_THRESHOLD' ] = int (os.environ.get ('SPOOL_THRESHOLD' , 1024 * 1024))  # uploads above 1 MB go to disk
 app.config[ 'ALLOWED_EXTENSIONS' ] = {'xlsx' , 'csv'}
 app.config[ 'YEAR_API_ENDPOINT' ] = None  # Set your API endpoint if available
+app.config[ 'MODEL_STORE_DIR' ] = os.environ.get ('MODEL_STORE_DIR' , default_store_dir ())
+app.config[ 'MODEL_STORE_MAX_ENTRIES' ] = int (os.environ.get ('MODEL_STORE_MAX_ENTRIES' , 8))  # per worker
+app.config[ 'MODEL_STORE_TTL' ] = int (os.environ.get ('MODEL_STORE_TTL' , 3600))  # idle seconds before release
 
 # Suppress sklearn warnings
 warnings.filterwarnings ("ignore" , category=UserWarning , message="X does not have valid feature names")
@@ -28,21 +38,22 @@ class DataProcessor:
             '£': 105.3 ,  # GBP to INR
             '₹': 1  # INR
         }
+        self.profiler = DataProfiler ()
 
-    def _convert_to_inr(self , value):
-        if pd.isna (value):
-            return None
+    def _convert_to_inr(self , values):
+        """Vectorized conversion of a Total column; returns INR amounts and the currency of each value"""
+        if pd.api.types.is_numeric_dtype (values):
+            return values.astype (float) , pd.Series ('plain' , index=values.index).where (values.notna ())
 
-        match = re.search (r'([₹$€£])\s*(\d[\d,.]*)' , str (value))
-        if match:
-            currency = match.group (1)
-            amount = float (match.group (2).replace (',' , ''))
-            return amount * self.currency_rates[ currency ]
+        text = values.astype (str).where (values.notna ())
+        parts = text.str.extract (r'([₹$€£])\s*(\d[\d,.]*)')
+        symbol_amounts = pd.to_numeric (parts[ 1 ].str.replace (',' , '' , regex=False) , errors='coerce') \
+                         * parts[ 0 ].map (self.currency_rates)
+        plain_amounts = pd.to_numeric (text.str.replace (',' , '' , regex=False) , errors='coerce')
 
-        try:
-            return float (str (value).replace (',' , ''))
-        except:
-            return None
+        amounts = symbol_amounts.where (parts[ 0 ].notna () , plain_amounts).astype (float)
+        currency = parts[ 0 ].fillna ('plain').where (values.notna ())
+        return amounts , currency
 
     def _fetch_year_from_api(self , filename):
         """Fetch year from API if available"""
@@ -64,9 +75,12 @@ class DataProcessor:
 
     def process(self , file , year_info=None):
         try:
-            # Read file
+            # Read file, straight from the spooled copy on disk when there is one
+            path = spooled_path (file)
             if file.filename.endswith ('.xlsx'):
-                df = pd.read_excel (file)
+                df = pd.read_excel (path or file)
+            elif path:
+                df = pd.read_csv (path , memory_map=True)
             else:
                 df = pd.read_csv (file)
 
@@ -121,8 +135,10 @@ class DataProcessor:
 
             print (f"Year source for {file.filename}: {year_source}")
 
-            # Process currency and clean data
-            df[ 'Total_INR' ] = df[ 'Total' ].apply (self._convert_to_inr)
+            # Process currency, profile the raw rows, then clean data
+            total_inr , currency = self._convert_to_inr (df[ 'Total' ])
+            self.profiler.profile_file (file.filename , df , total_inr , currency)
+            df[ 'Total_INR' ] = total_inr
             df = df.dropna (subset=[ 'Year' , 'Total_INR' , 'Service ID' ])
 
             # Debug: Print cleaned data
@@ -176,6 +192,36 @@ class ServicePredictor:
             print (f"Coefficient: {self.models[ first_service ].coef_[ 0 ]}")
             print (f"Intercept: {self.models[ first_service ].intercept_}")
 
+    def export_arrays(self):
+        """Flatten the trained models into arrays for the shared model store"""
+        services = list (self.models.keys ())
+        return {
+            'services': services ,
+            'categories': [ self.service_info[ s ][ 'category' ] for s in services ] ,
+            'coef': np.array ([ self.models[ s ].coef_[ 0 ] for s in services ] , dtype=float) ,
+            'intercept': np.array ([ self.models[ s ].intercept_ for s in services ] , dtype=float) ,
+            'latest_revenue': np.array ([ self.service_info[ s ][ 'latest_revenue' ] for s in services ] ,
+                                        dtype=float)
+        }
+
+    def load_entry(self , entry):
+        """Rebuild the models from a store entry without retraining"""
+        self.models = {}
+        self.service_info = {}
+        coef = entry.arrays[ 'coef' ]
+        intercept = entry.arrays[ 'intercept' ]
+        latest_revenue = entry.arrays[ 'latest_revenue' ]
+
+        for i , service in enumerate (entry.model_services):
+            model = LinearRegression ()
+            model.coef_ = coef[ i:i + 1 ]  # view into the mapped array, no copy
+            model.intercept_ = float (intercept[ i ])
+            self.models[ service ] = model
+            self.service_info[ service ] = {
+                'category': entry.model_categories[ i ] ,
+                'latest_revenue': float (latest_revenue[ i ])
+            }
+
     def predict(self , future_years):
         predictions = [ ]
         for service , model in self.models.items ():
@@ -204,11 +250,83 @@ class ServicePredictor:
         return pd.DataFrame (predictions)
 
 
+PROFILE_TEMPLATE = '''
+    <h2>Data Quality</h2>
+    <p class="year-note">Profiling took {{ "%.1f"|format(profiler.seconds * 1000) }} ms
+       ({{ "%.1f"|format(share) }}% of the {{ "%.2f"|format(pipeline_seconds) }} s pipeline)</p>
+    <table>
+        <thead>
+            <tr>
+                <th>File</th>
+                <th>Rows</th>
+                <th>Dropped</th>
+                <th>Unparseable Totals</th>
+                <th>Repeated (Service ID, Year)</th>
+                <th>Currencies</th>
+                <th>Null % by column</th>
+            </tr>
+        </thead>
+        <tbody>
+            {% for f in profiler.files %}
+            <tr>
+                <td>{{ f.filename }}</td>
+                <td>{{ f.rows }}</td>
+                <td>{{ f.dropped_rows }}</td>
+                <td>{{ f.unparseable_count }}{% if f.unparseable_examples %}
+                    <div class="year-note">e.g. {{ f.unparseable_examples|join(', ') }}</div>{% endif %}</td>
+                <td>{{ f.duplicate_rows }}</td>
+                <td>{% for symbol, count in f.currency_mix.items() %}{{ symbol }}: {{ count }}<br>{% endfor %}</td>
+                <td>{% for column, rate in f.null_rates.items() if rate > 0 %}{{ column }}: {{ rate }}%<br>{% endfor %}</td>
+            </tr>
+            {% endfor %}
+        </tbody>
+    </table>
+    {% if profiler.untrainable %}
+    <div class="data-warning">
+        {{ profiler.untrainable|length }} service(s) have fewer than 2 data points and were not trained:
+        {% for u in profiler.untrainable[:20] %}{{ u.service }}{% if not loop.last %}, {% endif %}{% endfor %}
+        {% if profiler.untrainable|length > 20 %}…{% endif %}
+    </div>
+    {% endif %}
+'''
+
+
+def render_profile(profiler , pipeline_seconds):
+    share = (profiler.seconds / pipeline_seconds * 100) if pipeline_seconds else 0
+    return render_template_string (PROFILE_TEMPLATE , profiler=profiler ,
+                                    pipeline_seconds=pipeline_seconds , share=share)
+
+
 def allowed_file(filename):
     return '.' in filename and \
         filename.rsplit ('.' , 1)[ 1 ].lower () in app.config[ 'ALLOWED_EXTENSIONS' ]
 
 
+_model_store = None
+
+
+def get_model_store():
+    """One store handle per worker process, created lazily after the fork"""
+    global _model_store
+    if _model_store is None:
+        _model_store = SharedModelStore (app.config[ 'MODEL_STORE_DIR' ] ,
+                                        max_entries=app.config[ 'MODEL_STORE_MAX_ENTRIES' ] ,
+                                        ttl=app.config[ 'MODEL_STORE_TTL' ])
+    return _model_store
+
+
+@app.errorhandler (413)
+def upload_too_large(e):
+    limit_mb = app.config[ 'MAX_CONTENT_LENGTH' ] // (1024 * 1024)
+    return render_template_string ('''
+        <div class="container">
+            <h1>Error</h1>
+            <p class="error-message">Upload too large. The limit is {{ limit_mb }} MB in total.</p>
+            <a href="/" class="back-link">← Try again</a>
+        </div>
+    ''' , limit_mb=limit_mb) , 413
+
+
 @app.route ('/' , methods=[ 'GET' ])
 def home():
     return render_template_string ('''
@@ -325,6 +443,7 @@ def analyze():
         ''')
 
     # Process all files
+    pipeline_start = time.perf_counter ()
     all_data = [ ]
     processor = DataProcessor ()
 
@@ -342,6 +461,8 @@ def analyze():
 
     # Combine all data
     combined_data = pd.concat (all_data , ignore_index=True)
+    processor.profiler.profile_training (combined_data)
+    processor.profiler.print_report ()
 
     # Debug: Print combined data stats
     print ("\n=== Combined Data ===")
@@ -349,10 +470,19 @@ def analyze():
     print ("Years available:" , combined_data[ 'Year' ].unique ())
     print ("Records per service:\n" , combined_data[ 'Service ID' ].value_counts ())
 
-    # Train model and predict
+    # Reuse models another worker already trained on the same data
     predictor = ServicePredictor ()
-    predictor.train (combined_data)
+    store = get_model_store ()
+    key = dataset_key (combined_data)
+    entry = store.get (key)
+    if entry is not None:
+        print (f"\n=== Using shared models for dataset {key} ===")
+        predictor.load_entry (entry)
+    else:
+        predictor.train (combined_data)
+        store.publish (key , combined_data , predictor.export_arrays ())
     results = predictor.predict (future_years)
+    profile_html = render_profile (processor.profiler , time.perf_counter () - pipeline_start)
 
     if results.empty:
         return render_template_string ('''
@@ -367,9 +497,10 @@ def analyze():
                     <li>There are missing values in critical columns</li>
                 </ul>
                 <p>Please check your input files and try again.</p>
+                {{ profile_html|safe }}
                 <a href="/" style="display: inline-block; margin-top: 20px;">← Back to Upload</a>
             </div>
-        ''')
+        ''' , profile_html=profile_html)
 
     # Create visualization
     try:
@@ -521,17 +652,51 @@ def analyze():
                         </tbody>
                     </table>
                 </div>
+                {{ profile_html|safe }}
                 <a href="/" class="back-link">← Analyze Another File</a>
+                <a href="/export/{{ export_key }}.xlsx?years={{ years|join(',') }}" class="back-link">Download Excel</a>
             </div>
         </body>
         </html>
     ''' ,
                                    results=formatted_results ,
                                    years=future_years ,
+                                   export_key=key ,
+                                   profile_html=profile_html ,
                                    graph_json=json.dumps (fig , cls=plotly.utils.PlotlyJSONEncoder)
                                    )
 
 
+@app.route ('/export/<key>.xlsx' , methods=[ 'GET' ])
+def export(key):
+    """Stream the data and projections of a dataset any worker has analyzed"""
+    entry = get_model_store ().get (key) if valid_key (key) else None
+    if entry is None:
+        return render_template_string ('''
+            <div class="container">
+                <h1>Export Expired</h1>
+                <p class="error-message">This analysis is no longer available. Please upload the files again.</p>
+                <a href="/" class="back-link">← Try again</a>
+            </div>
+        ''') , 404
+
+    try:
+        future_years = [ int (y.strip ()) for y in request.args.get ('years' , '').split (',') if y.strip () ]
+    except ValueError:
+        future_years = [ ]
+
+    predictor = ServicePredictor ()
+    predictor.load_entry (entry)
+    projections = predictor.predict (future_years) if future_years else None
+    data = entry.dataset ().rename (columns={'Total_INR': 'Total'})
+
+    return Response (
+        stream_workbook (data , projections) ,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' ,
+        headers={'Content-Disposition': f'attachment; filename=service_forecast_{key}.xlsx'}
+    )
+
+
 if __name__ == '__main__':
     os.makedirs (app.config[ 'UPLOAD_FOLDER' ] , exist_ok=True)
     app.run (debug=True)
\ No newline at end of file
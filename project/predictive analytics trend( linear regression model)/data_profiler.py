@@ -0,0 +1,68 @@
+import time
+
+import pandas as pd
+
+KEY_COLUMNS = [ 'Service ID' , 'Year' ]
+
+
+class DataProfiler:
+    """
+    Collects data-quality stats for every uploaded file in one vectorized
+    pass over columns that ingestion already computed, plus the services
+    the predictor will have to skip. Timings are kept so the cost of
+    profiling can be shown next to the total pipeline time.
+    """
+
+    def __init__(self):
+        self.files = [ ]
+        self.untrainable = [ ]
+        self.seconds = 0.0
+
+    def profile_file(self , filename , df , total_inr , currency):
+        """
+        df is the file as read (Year already resolved), total_inr/currency are
+        the vectorized conversion results for the Total column.
+        """
+        start = time.perf_counter ()
+        rows = len (df)
+
+        null_rates = (df.isna ().mean () * 100).round (1) if rows else pd.Series (0.0 , index=df.columns)
+        unparseable = df[ 'Total' ].notna () & total_inr.isna ()
+        currency_mix = currency[ total_inr.notna () ].value_counts ()
+
+        present_keys = [ c for c in KEY_COLUMNS if c in df.columns ]
+        duplicates = int (df.duplicated (subset=present_keys , keep=False).sum ()) if present_keys else 0
+
+        critical = [ c for c in [ 'Year' , 'Service ID' ] if c in df.columns ]
+        dropped = int ((df[ critical ].isna ().any (axis=1) | total_inr.isna ()).sum ())
+
+        self.files.append ({
+            'filename': filename ,
+            'rows': rows ,
+            'null_rates': null_rates.to_dict () ,
+            'unparseable_count': int (unparseable.sum ()) ,
+            'unparseable_examples': df.loc[ unparseable , 'Total' ].astype (str).unique ()[ :5 ].tolist () ,
+            'currency_mix': {str (k): int (v) for k , v in currency_mix.items ()} ,
+            'duplicate_rows': duplicates ,
+            'dropped_rows': dropped
+        })
+        self.seconds += time.perf_counter () - start
+
+    def profile_training(self , clean_data , min_points=2):
+        """Services with fewer than min_points rows, which train() skips"""
+        start = time.perf_counter ()
+        counts = clean_data[ 'Service ID' ].value_counts ()
+        self.untrainable = [ {'service': service , 'points': int (points)}
+                             for service , points in counts[ counts < min_points ].items () ]
+        self.seconds += time.perf_counter () - start
+
+    def print_report(self):
+        print ("\n=== Data Quality ===")
+        for profile in self.files:
+            print (f"{profile[ 'filename' ]}: {profile[ 'rows' ]} rows, "
+                   f"{profile[ 'dropped_rows' ]} dropped, "
+                   f"{profile[ 'unparseable_count' ]} unparseable totals, "
+                   f"{profile[ 'duplicate_rows' ]} rows with a repeated (Service ID, Year), "
+                   f"currencies {profile[ 'currency_mix' ]}")
+        print (f"Untrainable services: {len (self.untrainable)}")
+        print (f"Profiling took {self.seconds * 1000:.1f} ms")
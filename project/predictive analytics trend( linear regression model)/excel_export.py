@@ -0,0 +1,132 @@
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import Workbook , load_workbook
+
+COMBINED_COLUMNS = [ 'Category' , 'Service ID' , 'Description' , 'Total' , 'Year' ]
+CHUNK_SIZE = 64 * 1024
+
+
+def _cell(value):
+    """openpyxl only accepts plain Python scalars"""
+    if pd.isna (value):
+        return None
+    return value.item () if hasattr (value , 'item') else value
+
+
+def _write_frame(ws , df , extra_rows=None):
+    """Stream a DataFrame row by row, appending extra cells to the first rows"""
+    extra_rows = extra_rows or {}
+    ws.append (list (df.columns) + extra_rows.get (0 , [ ]))
+    for i , row in enumerate (df.itertuples (index=False , name=None) , start=1):
+        ws.append ([ _cell (value) for value in row ] + extra_rows.get (i , [ ]))
+
+
+def top_categories(df , value_column='Total' , n=5):
+    return (df.groupby ('Category')[ value_column ].sum ()
+            .sort_values (ascending=False)
+            .head (n)
+            .reset_index ())
+
+
+def write_combined_workbook(final_data , target , projections=None , top_n=5):
+    """
+    Write the combined data, the MAX/MIN summary cells and (optionally) the
+    per-year projections in a single pass using openpyxl's write-only mode.
+    `target` can be a path or a binary file object. The first sheet keeps the
+    layout Analysis.py produced with to_excel + load_workbook: MAX and MIN
+    headers/values in the first two rows, one and three columns past the data.
+    """
+    wb = Workbook (write_only=True)
+
+    totals = final_data[ 'Total' ]
+    summary_cells = {
+        0: [ 'MAX' , None , 'MIN' ] ,
+        1: [ f"₹{_cell (totals.max ()):,}" , None , f"₹{_cell (totals.min ()):,}" ]
+    }
+    ws = wb.create_sheet ('Sheet1')
+    _write_frame (ws , final_data , summary_cells)
+
+    if projections is not None and not projections.empty:
+        ws = wb.create_sheet ('Projections')
+        wide = projections.pivot_table (index=[ 'Service ID' , 'Category' ] ,
+                                        columns='Year' ,
+                                        values='Predicted_INR').reset_index ()
+        wide.columns = [ str (c) for c in wide.columns ]
+        _write_frame (ws , wide)
+
+    ws = wb.create_sheet ('Summary')
+    ws.append ([ 'Statistic' , 'Value' ])
+    ws.append ([ 'MAX' , _cell (totals.max ()) ])
+    ws.append ([ 'MIN' , _cell (totals.min ()) ])
+    ws.append ([ ])
+    ws.append ([ f'Top {top_n} categories' , 'Total' ])
+    for category , value in top_categories (final_data , 'Total' , top_n).itertuples (index=False):
+        ws.append ([ category , _cell (value) ])
+
+    if projections is not None and not projections.empty:
+        last_year = projections[ 'Year' ].max ()
+        ws.append ([ ])
+        ws.append ([ f'Top {top_n} categories in {last_year}' , 'Predicted_INR' ])
+        latest = projections[ projections[ 'Year' ] == last_year ]
+        for category , value in top_categories (latest , 'Predicted_INR' , top_n).itertuples (index=False):
+            ws.append ([ category , _cell (value) ])
+
+    wb.save (target)
+
+
+def stream_workbook(final_data , projections=None):
+    """
+    Build the workbook in a spooled temp file (rows never accumulate in
+    memory) and yield it back in fixed-size chunks for a streamed response.
+    """
+    with tempfile.TemporaryFile () as spool:
+        write_combined_workbook (final_data , spool , projections)
+        spool.seek (0)
+        while True:
+            chunk = spool.read (CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _two_pass_export(final_data , path):
+    """The original Analysis.py approach, kept for the benchmark"""
+    final_data.to_excel (path , index=False)
+    wb = load_workbook (path)
+    ws = wb.active
+    ws.cell (row=1 , column=6).value = "MAX"
+    ws.cell (row=1 , column=8).value = "MIN"
+    ws.cell (row=2 , column=6).value = f"₹{final_data[ 'Total' ].max ():,}"
+    ws.cell (row=2 , column=8).value = f"₹{final_data[ 'Total' ].min ():,}"
+    wb.save (path)
+
+
+def benchmark(source='ALL_SERVICES_COMBINED.xlsx' , repeat=3):
+    final_data = pd.read_excel (source)[ COMBINED_COLUMNS ]
+    out_dir = tempfile.mkdtemp ()
+    timings = {}
+
+    for name , export in [ ('two-pass (to_excel + load_workbook)' , _two_pass_export) ,
+                           ('single-pass write-only' , write_combined_workbook) ]:
+        path = os.path.join (out_dir , 'bench.xlsx')
+        best = float ('inf')
+        for _ in range (repeat):
+            start = time.perf_counter ()
+            export (final_data , path)
+            best = min (best , time.perf_counter () - start)
+        timings[ name ] = best
+        os.remove (path)
+
+    os.rmdir (out_dir)
+    print (f"Rows exported: {len (final_data)} (best of {repeat})")
+    for name , seconds in timings.items ():
+        print (f"{name:<40} {seconds * 1000:8.1f} ms")
+    return timings
+
+
+if __name__ == '__main__':
+    benchmark (*sys.argv[ 1:2 ])
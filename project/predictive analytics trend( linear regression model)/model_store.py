@@ -0,0 +1,276 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+KEY_LENGTH = 20
+KEY_PATTERN = re.compile (f'[0-9a-f]{{{KEY_LENGTH}}}')
+
+
+def default_store_dir():
+    """Prefer /dev/shm so the arrays live in shared memory, not on disk"""
+    base = '/dev/shm' if os.path.isdir ('/dev/shm') else tempfile.gettempdir ()
+    return os.path.join (base , 'service_predictor_store')
+
+
+def dataset_key(clean_data):
+    """Content hash of the cleaned dataset, identical in every worker"""
+    digest = hashlib.sha1 ()
+    for column in [ 'Year' , 'Service ID' , 'Category' , 'Total_INR' ]:
+        values = clean_data[ column ]
+        if values.dtype == object:
+            values = values.astype (str)
+        digest.update (column.encode ())
+        digest.update (pd.util.hash_pandas_object (values , index=False).values.tobytes ())
+    return digest.hexdigest ()[ :KEY_LENGTH ]
+
+
+def valid_key(key):
+    """Only keys dataset_key can produce ever reach the filesystem"""
+    return isinstance (key , str) and KEY_PATTERN.fullmatch (key) is not None
+
+
+@contextmanager
+def _locked(path):
+    while True:
+        handle = open (path , 'a+b')
+        if fcntl:
+            fcntl.flock (handle , fcntl.LOCK_EX)
+            # The last holder unlinks the lock file when it frees the entry;
+            # if that happened while we waited, lock the new file instead
+            try:
+                if os.stat (path).st_ino == os.fstat (handle.fileno ()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            handle.close ()
+        else:
+            handle.seek (0)
+            msvcrt.locking (handle.fileno () , msvcrt.LK_LOCK , 1)
+            break
+    try:
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock (handle , fcntl.LOCK_UN)
+        else:
+            handle.seek (0)
+            msvcrt.locking (handle.fileno () , msvcrt.LK_UNLCK , 1)
+        handle.close ()
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':  # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill (pid , 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class StoreEntry:
+    """Read-only, memory-mapped view of one published dataset and its models"""
+
+    def __init__(self , key , path):
+        self.key = key
+        self.path = path
+        with open (os.path.join (path , 'meta.json')) as f:
+            meta = json.load (f)
+        self.services = meta[ 'services' ]
+        self.categories = meta[ 'categories' ]
+        self.model_services = meta[ 'model_services' ]
+        self.model_categories = meta[ 'model_categories' ]
+        self.arrays = {
+            name: np.load (os.path.join (path , f'{name}.npy') , mmap_mode='r')
+            for name in meta[ 'arrays' ]
+        }
+
+    def dataset(self):
+        """Rebuild the cleaned DataFrame from the compact columns"""
+        return pd.DataFrame ({
+            'Year': self.arrays[ 'year' ] ,
+            'Service ID': pd.Categorical.from_codes (self.arrays[ 'service_code' ] ,
+                                                     self.services).astype (object) ,
+            'Category': pd.Categorical.from_codes (self.arrays[ 'category_code' ] ,
+                                                   self.categories).astype (object) ,
+            'Total_INR': self.arrays[ 'total_inr' ]
+        })
+
+
+class SharedModelStore:
+    """
+    Publishes trained coefficients and the compact cleaned dataset as .npy
+    files under a shared directory, so every WSGI worker can map the same
+    pages instead of retraining. Each entry keeps a list of attached worker
+    pids and is deleted, with its .refs and .lock files, once the last live
+    worker releases it.
+
+    A worker holds at most `max_entries` entries and lets go of any it has
+    not used for `ttl` seconds, least recently used first, so the shared
+    directory does not grow with every dataset ever uploaded. Entries whose
+    holders all died are removed by the next publish.
+    """
+
+    def __init__(self , store_dir=None , max_entries=8 , ttl=3600):
+        self.store_dir = store_dir or default_store_dir ()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        os.makedirs (self.store_dir , exist_ok=True)
+        self.attached = OrderedDict ()  # key -> StoreEntry, least recently used first
+        self.last_used = {}
+        atexit.register (self.release_all)
+
+    def _entry_path(self , key):
+        return os.path.join (self.store_dir , key)
+
+    def _apply_refs(self , key , add=None , remove=None):
+        """Prune dead pids, apply the change and return the live holder count; caller holds the lock"""
+        refs_path = self._entry_path (key) + '.refs'
+        try:
+            with open (refs_path) as f:
+                pids = set (json.load (f))
+        except (FileNotFoundError , ValueError):
+            pids = set ()
+        pids = {pid for pid in pids if _pid_alive (pid)}
+        if add and os.path.isdir (self._entry_path (key)):
+            pids.add (add)
+        if remove:
+            pids.discard (remove)
+
+        if pids:
+            with open (refs_path , 'w') as f:
+                json.dump (sorted (pids) , f)
+        else:
+            shutil.rmtree (self._entry_path (key) , ignore_errors=True)
+            # The lock file goes too; Windows cannot unlink it while we hold it
+            leftovers = [ refs_path ] + ([ self._entry_path (key) + '.lock' ] if fcntl else [ ])
+            for leftover in leftovers:
+                try:
+                    os.remove (leftover)
+                except FileNotFoundError:
+                    pass
+        return len (pids)
+
+    def _update_refs(self , key , add=None , remove=None):
+        with _locked (self._entry_path (key) + '.lock'):
+            return self._apply_refs (key , add=add , remove=remove)
+
+    def _attach(self , key):
+        try:
+            entry = StoreEntry (key , self._entry_path (key))
+        except FileNotFoundError:  # released by its last holder in between
+            self._update_refs (key , remove=os.getpid ())
+            return None
+        self.attached[ key ] = entry
+        self.last_used[ key ] = time.monotonic ()
+        self.evict (keep=key)
+        return entry
+
+    def get(self , key):
+        """Attach to an entry published by any worker, or return None"""
+        if not valid_key (key):
+            return None
+        if key in self.attached:
+            self.attached.move_to_end (key)
+            self.last_used[ key ] = time.monotonic ()
+            self.evict (keep=key)
+            return self.attached[ key ]
+        if not os.path.exists (os.path.join (self._entry_path (key) , 'meta.json')):
+            return None
+
+        if not self._update_refs (key , add=os.getpid ()):
+            return None
+        return self._attach (key)
+
+    def publish(self , key , clean_data , arrays):
+        """Write a new entry atomically; the first worker to finish wins"""
+        service_code , services = pd.factorize (clean_data[ 'Service ID' ])
+        category_code , categories = pd.factorize (clean_data[ 'Category' ])
+
+        columns = {
+            'year': clean_data[ 'Year' ].to_numpy (dtype=np.int16) ,
+            'service_code': service_code.astype (np.int32) ,
+            'category_code': category_code.astype (np.int32) ,
+            'total_inr': clean_data[ 'Total_INR' ].to_numpy (dtype=np.float64) ,
+            'coef': np.asarray (arrays[ 'coef' ] , dtype=np.float64) ,
+            'intercept': np.asarray (arrays[ 'intercept' ] , dtype=np.float64) ,
+            'latest_revenue': np.asarray (arrays[ 'latest_revenue' ] , dtype=np.float64)
+        }
+        meta = {
+            'services': services.tolist () ,
+            'categories': categories.tolist () ,
+            'model_services': pd.Index (arrays[ 'services' ]).tolist () ,
+            'model_categories': pd.Index (arrays[ 'categories' ]).tolist () ,
+            'arrays': sorted (columns)
+        }
+
+        self.sweep ()
+        tmp_path = tempfile.mkdtemp (prefix=f'.{key}-' , dir=self.store_dir)
+        for name , values in columns.items ():
+            np.save (os.path.join (tmp_path , f'{name}.npy') , values)
+        with open (os.path.join (tmp_path , 'meta.json') , 'w') as f:
+            json.dump (meta , f , default=str)
+
+        # Register as a holder under the same lock as the rename, so a
+        # sweep in another worker never sees the new entry without holders
+        with _locked (self._entry_path (key) + '.lock'):
+            try:
+                os.rename (tmp_path , self._entry_path (key))
+            except OSError:  # another worker published the same dataset first
+                shutil.rmtree (tmp_path , ignore_errors=True)
+            if key not in self.attached:
+                self._apply_refs (key , add=os.getpid ())
+
+        if key in self.attached:
+            return self.get (key)
+        return self._attach (key)
+
+    def sweep(self):
+        """Free entries whose holders have all exited without releasing them"""
+        for name in os.listdir (self.store_dir):
+            if name.startswith ('.') or name in self.attached:
+                continue
+            key = name.rsplit ('.' , 1)[ 0 ] if name.endswith (('.refs' , '.lock')) else name
+            if key in self.attached:
+                continue
+            self._update_refs (key)
+
+    def evict(self , keep=None):
+        """Release entries idle for longer than the TTL, then the least recently used over the limit"""
+        now = time.monotonic ()
+        for key in list (self.attached):
+            if key != keep and now - self.last_used[ key ] > self.ttl:
+                self.release (key)
+        for key in list (self.attached):
+            if len (self.attached) <= self.max_entries:
+                break
+            if key != keep:
+                self.release (key)
+
+    def release(self , key):
+        self.last_used.pop (key , None)
+        if self.attached.pop (key , None) is not None:
+            self._update_refs (key , remove=os.getpid ())
+
+    def release_all(self):
+        for key in list (self.attached):
+            self.release (key)
@@ -0,0 +1,43 @@
+import io
+import os
+import tempfile
+
+from flask import Request , current_app
+
+
+class SpoolingRequest (Request):
+    """
+    Request class that writes large uploads straight into UPLOAD_FOLDER while
+    the body is being parsed, instead of werkzeug's default in-memory spool.
+    Small requests (below SPOOL_THRESHOLD) stay in memory. Spooled files are
+    deleted when the request is closed at the end of the request context.
+    """
+
+    def _get_file_stream(self , total_content_length , content_type , filename=None , content_length=None):
+        threshold = current_app.config[ 'SPOOL_THRESHOLD' ]
+        if total_content_length is not None and total_content_length <= threshold:
+            return io.BytesIO ()
+
+        upload_folder = current_app.config[ 'UPLOAD_FOLDER' ]
+        os.makedirs (upload_folder , exist_ok=True)
+        spool = tempfile.NamedTemporaryFile (mode='w+b' , dir=upload_folder ,
+                                             prefix='upload-' , delete=False)
+        self.__dict__.setdefault ('spooled_paths' , [ ]).append (spool.name)
+        return spool
+
+    def close(self):
+        super ().close ()
+        for path in self.__dict__.pop ('spooled_paths' , [ ]):
+            try:
+                os.remove (path)
+            except OSError as e:
+                print (f"Could not remove spooled upload {path}: {str (e)}")
+
+
+def spooled_path(file):
+    """Path of the on-disk spool behind a FileStorage, or None if it's in memory"""
+    name = getattr (file.stream , 'name' , None)
+    if isinstance (name , str) and os.path.isfile (name):
+        file.stream.flush ()
+        return name
+    return None
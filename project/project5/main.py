@@ -1,39 +1,33 @@
 
-import json
+import sys
+from datetime import datetime
 from sentiment import analyze_sentiment
 from gamification import calculate_xp, get_feedback
+from storage import HabitStore
 
-DATA_FILE = "data.json"
-
-def load_data():
-    try:
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"xp": 0, "streak": 1}
-
-def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def show_history():
+    with HabitStore() as store:
+        for event in store.history():
+            day = datetime.fromtimestamp(event["ts"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{day}  score {event['score']:>3}  +{event['xp']} XP")
+        print(f"Total XP: {store.xp}")
 
 def main():
-    data = load_data()
-
-    print("\nSMART HABIT TRACKER")
-    reflection = input("Write your habit reflection:\n> ")
-
-    score = analyze_sentiment(reflection)
-    earned_xp = calculate_xp(score, data["streak"])
-
-    data["xp"] += earned_xp
-    data["streak"] += 1
+    with HabitStore() as store:
+        print("\nSMART HABIT TRACKER")
+        reflection = input("Write your habit reflection:\n> ")
 
-    save_data(data)
+        score = analyze_sentiment(reflection)
+        event = store.record(score, calculate_xp)
+        earned_xp = event["xp"]
 
-    print("\nFeedback:", get_feedback(score))
-    print(f"XP Earned: {earned_xp}")
-    print(f"Total XP: {data['xp']}")
-    print(f"Current Streak: {data['streak']} days")
+        print("\nFeedback:", get_feedback(score))
+        print(f"XP Earned: {earned_xp}")
+        print(f"Total XP: {store.xp}")
+        print(f"Current Streak: {store.streak} days")
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["history"]:
+        show_history()
+    else:
+        main()
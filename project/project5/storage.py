@@ -0,0 +1,180 @@
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer assumed
+    fcntl = None
+
+LOG_FILE = "events.log"
+SNAPSHOT_FILE = "data.json"
+SNAPSHOT_EVERY = 50      # events between snapshot rewrites
+SYNC_EVERY = 20          # events between fsyncs
+SYNC_INTERVAL = 1.0      # or seconds, whichever comes first
+
+
+class HabitStore:
+    """
+    Reflection events appended to a JSON-lines write-ahead log, with the
+    running totals in a snapshot (data.json) that records how far into the
+    log it has applied. Startup loads the snapshot and replays only the
+    tail after it, so recording an event costs one appended line whatever
+    the history length, and the log keeps the full history.
+
+    Appends take an exclusive lock on the log and first apply any events
+    other processes appended since, so the streak and XP of concurrent
+    writers never overwrite each other. A torn last line from a crash is
+    cut off on open.
+
+    fsync is batched: every SYNC_EVERY events or SYNC_INTERVAL seconds,
+    and on close. Events after the last fsync can be lost in a power
+    failure, never reordered or half-written into the middle of the log.
+    """
+
+    def __init__(self, directory=".", snapshot_every=SNAPSHOT_EVERY, sync_every=SYNC_EVERY,
+                 sync_interval=SYNC_INTERVAL):
+        self.log_path = os.path.join(directory, LOG_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.snapshot_every = snapshot_every
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+
+        self.state = {"xp": 0, "streak": 1, "events": 0, "offset": 0}
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.log = open(self.log_path, "a+b")
+
+        self._load_snapshot()
+        with self._locked():
+            self._repair_tail()
+            self._catch_up()
+
+    # ----- state -----
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as f:
+                # data.json from before the log existed has xp and streak only
+                self.state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+
+    def _catch_up(self):
+        """Applies events appended after the state's offset (by this process's past or by others)."""
+        self.log.seek(self.state["offset"])
+        for line in self.log:
+            if not line.endswith(b"\n"):
+                break
+            self._apply(json.loads(line))
+            self.state["offset"] += len(line)
+
+    def _apply(self, event):
+        self.state["xp"] += event["xp"]
+        self.state["streak"] += 1
+        self.state["events"] += 1
+
+    def _repair_tail(self):
+        size = self.log.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        self.log.seek(max(size - 1, 0))
+        if self.log.read(1) == b"\n":
+            return
+        # cut back to the end of the last complete line
+        block = min(size, 64 * 1024)
+        end = size
+        while end > 0:
+            start = max(end - block, 0)
+            self.log.seek(start)
+            newline = self.log.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        self.log.truncate(end)
+
+    def snapshot(self):
+        """Writes the totals atomically (temp file + rename)."""
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    # ----- writing -----
+
+    def _locked(self):
+        return _FileLock(self.log)
+
+    def record(self, score, earn):
+        """
+        Appends one reflection. earn(score, streak) computes the XP from the
+        streak at the moment of writing. Returns the event.
+        """
+        with self._locked():
+            self._catch_up()
+            event = {"ts": time.time(), "score": score, "xp": earn(score, self.state["streak"])}
+            line = (json.dumps(event) + "\n").encode()
+            self.log.write(line)
+            self.log.flush()
+            self._apply(event)
+            self.state["offset"] += len(line)
+
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+        if self.state["events"] % self.snapshot_every == 0:
+            self.sync()
+            self.snapshot()
+        return event
+
+    def sync(self):
+        if self.unsynced:
+            os.fsync(self.log.fileno())
+            self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self.log.close()
+
+    # ----- reading -----
+
+    @property
+    def xp(self):
+        return self.state["xp"]
+
+    @property
+    def streak(self):
+        return self.state["streak"]
+
+    def history(self, since=None):
+        """Every event in order (ts is a Unix time), optionally only those at or after `since`."""
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                event = json.loads(line)
+                if since is None or event["ts"] >= since:
+                    yield event
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _FileLock:
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,37 @@
+import pytest
+
+from sentiment import SentimentMatcher, analyze_sentiment, load_lexicon, tokenize
+
+
+def test_quoted_and_trailing_apostrophe_words():
+    assert tokenize("I felt 'good' today") == ["i", "felt", "good", "today"]
+    assert tokenize("the dogs' walk, rock 'n' roll") == ["the", "dogs", "walk", "rock", "n", "roll"]
+    assert tokenize("I'm fine, it's ok") == ["i'm", "fine", "it's", "ok"]
+    assert analyze_sentiment("I felt 'good' today") == 2
+
+
+def test_words_in_any_script():
+    assert tokenize("Naïve, खुश हूँ! café") == ["naïve", "खुश", "हूँ", "café"]
+    # decomposed input (i + combining diaeresis) matches the composed term
+    assert tokenize("naïve") == ["naïve"]
+    assert SentimentMatcher({"खुश": 3}).score("आज मैं खुश हूँ") == 3
+
+
+def test_lexicon_weights_are_integers(tmp_path):
+    path = tmp_path / "lexicon.tsv"
+    path.write_text("# term\tweight\n\nshowed up\t3\nmeh\t-1\n", encoding="utf-8")
+
+    lexicon = load_lexicon(path)
+
+    assert lexicon == {"showed up": 3, "meh": -1}
+    assert all(type(weight) is int for weight in lexicon.values())
+
+
+@pytest.mark.parametrize("line, message", [("broken line", "expected 'term<TAB>weight'"),
+                                           ("good\t1.5", "not an integer")])
+def test_bad_lexicon_line_names_the_line(tmp_path, line, message):
+    path = tmp_path / "lexicon.tsv"
+    path.write_text(f"good\t2\n{line}\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match=f":2: .*{message}"):
+        load_lexicon(path)